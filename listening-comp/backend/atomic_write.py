@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+
+def write_atomic(filepath: str, payload: bytes):
+    """Write a file via a temporary file and rename, so readers never see a partial write
+
+    The directory is created if needed. The temporary file sits next to the
+    target (so the rename stays on one filesystem) as ".tmp-*.part".
+    """
+    directory = os.path.dirname(filepath) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,190 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from backend.atomic_write import write_atomic
+from backend.index_manifest import file_sha256
+from backend.rate_limiter import RateLimiter
+from backend.structured_data import TranscriptStructurer
+
+# USD per 1K tokens for the default model (gpt-3.5-turbo)
+DEFAULT_PROMPT_PRICE = 0.0005
+DEFAULT_COMPLETION_PRICE = 0.0015
+
+
+class StructureCheckpoint:
+    def __init__(self, path: str):
+        """Initialize the record of transcripts that were structured successfully
+
+        Entries hold the transcript's content hash, so an edited transcript
+        is structured again while unchanged ones are skipped after a restart.
+        """
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error loading checkpoint {path}: {str(e)}")
+
+    def is_done(self, filename: str, sha256: str) -> bool:
+        """Check whether a transcript with this content was already structured"""
+        entry = self.files.get(os.path.abspath(filename))
+        return bool(entry) and entry['sha256'] == sha256
+
+    def mark_done(self, filename: str, sha256: str, output: str, sections: Dict[int, str]):
+        """Record a structured transcript and write the checkpoint atomically"""
+        self.files[os.path.abspath(filename)] = {
+            'sha256': sha256,
+            'output': output,
+            'sections': sorted(sections),
+            'finished_at': datetime.datetime.now().isoformat()
+        }
+        write_atomic(self.path, json.dumps({'files': self.files}, ensure_ascii=False).encode('utf-8'))
+
+
+class BatchStructurer:
+    def __init__(
+        self,
+        structurer: TranscriptStructurer,
+        output_dir: str,
+        workers: int = 4,
+        checkpoint_path: Optional[str] = None,
+        progress_every: int = 10
+    ):
+        """Initialize a batch runner that structures a directory of transcripts
+
+        Up to `workers` transcripts are processed at once; the structurer's
+        own concurrency and rate limiter bound the requests they send. Each
+        finished transcript is checkpointed right after its question files
+        are written, so an interrupted run resumes where it stopped.
+        """
+        if workers < 1:
+            raise ValueError("workers must be positive")
+        self.structurer = structurer
+        self.output_dir = output_dir
+        self.workers = workers
+        self.progress_every = progress_every
+        self.checkpoint = StructureCheckpoint(
+            checkpoint_path or os.path.join(output_dir, ".structure_checkpoint.json")
+        )
+
+    def _structure_file(self, filename: str) -> Tuple[str, Dict[int, str]]:
+        """Structure one transcript and write its section files (runs in a worker thread)"""
+        transcript = self.structurer.load_transcript(filename)
+        if not transcript:
+            return "", {}
+        sections = self.structurer.structure_transcript(transcript)
+        # Sections without any question are not worth a file
+        sections = {section_num: content for section_num, content in sections.items() if content}
+        if not sections:
+            return "", {}
+        video_id = os.path.splitext(os.path.basename(filename))[0]
+        output = os.path.join(self.output_dir, f"{video_id}.txt")
+        if not self.structurer.save_questions(sections, output):
+            return "", {}
+        return output, sections
+
+    def _report(self, totals: Dict[str, int], total_files: int, started: float):
+        """Print progress and throughput so far"""
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        usage = self.structurer.usage
+        print(f"[{totals['done'] + totals['failed']}/{total_files} transcripts] "
+              f"{totals['done'] / elapsed * 60:.1f} transcripts/min, {usage['requests']} requests, "
+              f"{usage['cached']} cached, {totals['failed']} failed")
+
+    def run(self, directory: str, force: bool = False) -> Dict[str, float]:
+        """Structure every *.txt transcript in a directory and return totals"""
+        started = time.perf_counter()
+        usage_before = dict(self.structurer.usage)
+        totals = {"transcripts": 0, "skipped": 0, "done": 0, "failed": 0}
+
+        to_process: List[Tuple[str, str]] = []
+        for filename in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+            totals["transcripts"] += 1
+            sha256 = file_sha256(filename)
+            if not force and self.checkpoint.is_done(filename, sha256):
+                totals["skipped"] += 1
+            else:
+                to_process.append((filename, sha256))
+        print(f"Found {totals['transcripts']} transcripts, {len(to_process)} to structure")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            remaining = iter(to_process)
+            in_flight = {}
+            while True:
+                # Submit lazily so finished files are checkpointed while others run
+                for filename, sha256 in remaining:
+                    in_flight[executor.submit(self._structure_file, filename)] = (filename, sha256)
+                    if len(in_flight) >= self.workers:
+                        break
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    filename, sha256 = in_flight.pop(future)
+                    try:
+                        output, sections = future.result()
+                    except Exception as e:
+                        print(f"Error structuring {filename}: {str(e)}")
+                        output, sections = "", {}
+                    if sections:
+                        self.checkpoint.mark_done(filename, sha256, output, sections)
+                        totals["done"] += 1
+                    else:
+                        print(f"No questions extracted from {filename}; it will be retried next run")
+                        totals["failed"] += 1
+                    if self.progress_every and (totals["done"] + totals["failed"]) % self.progress_every == 0:
+                        self._report(totals, len(to_process), started)
+
+        for name, count in self.structurer.usage.items():
+            totals[name] = count - usage_before[name]
+        totals["seconds"] = time.perf_counter() - started
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Structure a directory of JLPT transcripts into question files")
+    parser.add_argument("directory", nargs="?", default="backend/data/transcripts",
+                        help="Directory containing <video_id>.txt transcripts")
+    parser.add_argument("--output-dir", default="backend/data/questions")
+    parser.add_argument("--workers", type=int, default=4, help="Transcripts processed at once")
+    parser.add_argument("--max-concurrency", type=int, default=3, help="Requests in flight per transcript")
+    parser.add_argument("--requests-per-minute", type=float, default=60, help="Global API request rate limit")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file (defaults to <output-dir>/.structure_checkpoint.json)")
+    parser.add_argument("--prompt-price", type=float, default=DEFAULT_PROMPT_PRICE,
+                        help="USD per 1K prompt tokens")
+    parser.add_argument("--completion-price", type=float, default=DEFAULT_COMPLETION_PRICE,
+                        help="USD per 1K completion tokens")
+    parser.add_argument("--progress-every", type=int, default=10, help="Report progress every N transcripts")
+    parser.add_argument("--force", action="store_true", help="Re-structure transcripts already checkpointed")
+    args = parser.parse_args()
+
+    structurer = TranscriptStructurer(
+        max_concurrency=args.max_concurrency,
+        rate_limiter=RateLimiter(args.requests_per_minute)
+    )
+    batch = BatchStructurer(structurer, args.output_dir, workers=args.workers,
+                            checkpoint_path=args.checkpoint, progress_every=args.progress_every)
+    totals = batch.run(args.directory, force=args.force)
+
+    minutes = max(totals["seconds"], 1e-9) / 60
+    cost = (totals["prompt_tokens"] * args.prompt_price + totals["completion_tokens"] * args.completion_price) / 1000
+    print(f"Done in {totals['seconds']:.1f}s: {totals['done']} structured, {totals['skipped']} skipped, "
+          f"{totals['failed']} failed of {totals['transcripts']} transcripts")
+    print(f"Throughput: {totals['done'] / minutes:.1f} transcripts/min, {totals['requests'] / minutes:.1f} requests/min "
+          f"({totals['cached']} served from cache)")
+    print(f"Tokens: {totals['prompt_tokens']} prompt (estimated {totals['estimated_prompt_tokens']}) + "
+          f"{totals['completion_tokens']} completion, estimated cost ${cost:.4f}")
+
+
+if __name__ == "__main__":
+    main()
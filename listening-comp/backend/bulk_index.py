@@ -0,0 +1,173 @@
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from backend.index_manifest import file_sha256
+from backend.vector_store import QuestionVectorStore, find_question_files, video_id_from_filename
+
+
+def parse_question_file(filename: str, section_num: int) -> Tuple[str, int, str, os.stat_result, str, List[Dict]]:
+    """Parse and hash one question file (runs in a worker process)
+
+    Parse errors propagate to the parent, which skips the file so its
+    previously indexed questions are kept.
+    """
+    stat = os.stat(filename)
+    sha256 = file_sha256(filename)
+    video_id = video_id_from_filename(filename)
+    questions = QuestionVectorStore.parse_questions_from_file(filename)
+    return filename, section_num, video_id, stat, sha256, questions
+
+
+class BulkIndexer:
+    def __init__(
+        self,
+        store: QuestionVectorStore,
+        workers: Optional[int] = None,
+        chunk_size: int = 256,
+        progress_every: int = 100
+    ):
+        """Initialize a bulk indexer for directories of *_sectionN.txt files
+
+        Files are parsed in a pool of `workers` processes. Changed questions are
+        streamed into the section collections in chunks of `chunk_size`, so
+        memory stays bounded by the chunk size and the number of files in flight.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.progress_every = progress_every
+
+        self._buffers: Dict[int, List[Tuple[str, int, Dict]]] = {2: [], 3: []}
+        # Manifest updates wait until the file's questions have been flushed
+        self._pending_manifest: List[Tuple] = []
+
+    def _flush(self):
+        """Write buffered questions, then record their files in the manifest"""
+        for section in self._buffers:
+            if self._buffers[section]:
+                self.store.upsert_questions(section, self._buffers[section])
+                self._buffers[section] = []
+        if self._pending_manifest:
+            for update in self._pending_manifest:
+                self.store.manifest.update(*update)
+            self.store.manifest.save()
+            self._pending_manifest = []
+
+    def _ingest(self, result, force: bool, totals: Dict[str, int]):
+        """Diff one parsed file against the index and buffer its changes"""
+        filename, section_num, video_id, stat, sha256, questions = result
+        changed, removed, current, summary = self.store.plan_file_update(
+            filename, section_num, video_id, questions, force=force
+        )
+        self.store.delete_questions(section_num, removed)
+        for key, count in summary.items():
+            totals[key] += count
+
+        buffer = self._buffers[section_num]
+        buffer.extend((video_id, idx, question) for idx, question in changed)
+        self._pending_manifest.append((filename, stat, sha256, section_num, video_id, current))
+        while len(buffer) >= self.chunk_size:
+            chunk, self._buffers[section_num] = buffer[:self.chunk_size], buffer[self.chunk_size:]
+            self.store.upsert_questions(section_num, chunk)
+            buffer = self._buffers[section_num]
+        if not any(self._buffers.values()):
+            # Everything buffered so far is written; record the finished files
+            self._flush()
+
+    def _report(self, totals: Dict[str, int], total_files: int, started: float):
+        """Print progress and throughput so far"""
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        questions = totals["added"] + totals["updated"]
+        print(f"[{totals['files']}/{total_files} files] {questions} questions written, "
+              f"{totals['files'] / elapsed:.1f} files/s, {questions / elapsed:.1f} questions/s")
+
+    def index_directory(self, directory: str, force: bool = False) -> Dict[str, float]:
+        """Index every question file under a directory and return totals
+
+        Unchanged files are skipped via the manifest without being parsed,
+        questions from files that no longer exist are deleted and files
+        holding near-duplicates of deleted questions are re-indexed.
+        """
+        started = time.perf_counter()
+        totals = {"files": 0, "parsed": 0, "failed": 0, "added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        question_files = find_question_files(directory)
+
+        to_parse = []
+        for filename, section_num in question_files:
+            unchanged = self.store.check_file_unchanged(filename, section_num, force=force)
+            if unchanged is None:
+                to_parse.append((filename, section_num))
+            else:
+                totals["files"] += 1
+                totals["unchanged"] += unchanged
+        print(f"Found {len(question_files)} question files, {len(to_parse)} to parse")
+
+        if to_parse:
+            max_in_flight = self.workers * 2
+            remaining = iter(to_parse)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                in_flight = {}
+                while True:
+                    # Keep a bounded number of files in flight so results are streamed
+                    for filename, section_num in remaining:
+                        in_flight[executor.submit(parse_question_file, filename, section_num)] = filename
+                        if len(in_flight) >= max_in_flight:
+                            break
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        filename = in_flight.pop(future)
+                        try:
+                            self._ingest(future.result(), force, totals)
+                            totals["parsed"] += 1
+                        except Exception as e:
+                            print(f"Error indexing {filename}, skipping it: {str(e)}")
+                            totals["failed"] += 1
+                        totals["files"] += 1
+                        if self.progress_every and totals["files"] % self.progress_every == 0:
+                            self._report(totals, len(question_files), started)
+            self._flush()
+
+        totals["deleted"] += self.store.remove_missing_files(
+            directory, [filename for filename, _ in question_files]
+        )
+        for key, count in self.store.reindex_stale_files().items():
+            totals[key] += count
+        self._report(totals, len(question_files), started)
+
+        totals["seconds"] = time.perf_counter() - started
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk index a directory of JLPT question files")
+    parser.add_argument("directory", help="Directory containing *_sectionN.txt files")
+    parser.add_argument("--persist-directory", default="backend/data/vector_store")
+    parser.add_argument("--backend", choices=["openai", "local"], default=None,
+                        help="Embedding backend (defaults to EMBEDDING_BACKEND or openai)")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (defaults to CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Questions per collection write")
+    parser.add_argument("--progress-every", type=int, default=100, help="Report progress every N files")
+    parser.add_argument("--force", action="store_true", help="Re-index files even if unchanged")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Store near-duplicate questions as aliases of an existing question")
+    args = parser.parse_args()
+
+    store = QuestionVectorStore(args.persist_directory, embedding_backend=args.backend, dedup=args.dedup)
+    indexer = BulkIndexer(store, workers=args.workers, chunk_size=args.chunk_size,
+                          progress_every=args.progress_every)
+    totals = indexer.index_directory(args.directory, force=args.force)
+    print(f"Done in {totals['seconds']:.2f}s: {totals['files']} files ({totals['parsed']} parsed, "
+          f"{totals['failed']} failed), "
+          f"{totals['added']} added, {totals['updated']} updated, {totals['deleted']} deleted, "
+          f"{totals['unchanged']} unchanged")
+
+
+if __name__ == "__main__":
+    main()
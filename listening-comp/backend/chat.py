@@ -4,6 +4,7 @@ import openai
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 import os
+from backend.token_budget import estimate_message_tokens, log_token_usage
 
 # Load environment variables from .env file
 load_dotenv()
@@ -27,15 +28,18 @@ Keep your responses concise but informative."""
 Please make sure you have created a .env file with your API key:
 OPENAI_API_KEY=your-api-key-here"""
                 
+            messages = [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": message}
+            ]
+            estimated = estimate_message_tokens(messages)
             response = openai.ChatCompletion.create(
                 model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": message}
-                ],
+                messages=messages,
                 temperature=0.7,
                 max_tokens=200
             )
+            log_token_usage("tutor response", estimated, response.get('usage'))
             return response.choices[0].message['content'].strip()
         except Exception as e:
             return f"""I apologize, but I encountered an error: {str(e)}
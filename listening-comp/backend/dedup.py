@@ -0,0 +1,278 @@
+import argparse
+import hashlib
+import os
+import unicodedata
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.docstore import QuestionDocStore
+from backend.sqlite_store import SQLiteStore
+
+# Mersenne prime for the MinHash permutations (keeps a*x+b inside uint64)
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Split normalized text into overlapping character shingles"""
+    normalized = "".join(unicodedata.normalize("NFKC", text).lower().split())
+    if len(normalized) <= size:
+        return [normalized] if normalized else []
+    return [normalized[i:i + size] for i in range(len(normalized) - size + 1)]
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    return float(np.mean(a == b))
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        """Initialize MinHash signatures over character shingles"""
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Compute the MinHash signature of a text, or None if it is empty"""
+        tokens = set(shingles(text, self.shingle_size))
+        if not tokens:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(token.encode("utf-8")) for token in tokens),
+            dtype=np.uint64,
+            count=len(tokens)
+        ) % _MERSENNE_PRIME
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature: np.ndarray, bands: int) -> List[Tuple[int, int]]:
+    """Hash each band of a signature into an LSH bucket key"""
+    rows = len(signature) // bands
+    keys = []
+    for band in range(bands):
+        digest = hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "little", signed=True)))
+    return keys
+
+
+class NearDuplicateIndex(SQLiteStore):
+    def __init__(
+        self,
+        path: str,
+        num_perm: int = 128,
+        bands: int = 16,
+        threshold: float = 0.8
+    ):
+        """Initialize a persistent MinHash LSH index for near-duplicate questions
+
+        Signatures are split into `bands` bands; questions sharing any band
+        bucket are candidates, which are then confirmed when their estimated
+        Jaccard similarity is at least `threshold`. Near-duplicates that are
+        not stored are remembered as aliases of the question they duplicate.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS signatures (
+                question_id TEXT PRIMARY KEY,
+                section INTEGER NOT NULL,
+                signature BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                section INTEGER NOT NULL,
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                question_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_buckets_lookup ON buckets(section, band, bucket);
+            CREATE INDEX IF NOT EXISTS idx_buckets_question ON buckets(question_id);
+            CREATE TABLE IF NOT EXISTS aliases (
+                duplicate_id TEXT PRIMARY KEY,
+                canonical_id TEXT NOT NULL,
+                similarity REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_aliases_canonical ON aliases(canonical_id);
+        """)
+
+    def find_duplicate(
+        self,
+        section_num: int,
+        signature: np.ndarray,
+        exclude_id: Optional[str] = None
+    ) -> Optional[Tuple[str, float]]:
+        """Return the most similar stored (question_id, similarity) above the threshold"""
+        with self._lock:
+            candidates = set()
+            for band, bucket in band_keys(signature, self.bands):
+                candidates.update(question_id for (question_id,) in self._conn.execute(
+                    "SELECT question_id FROM buckets WHERE section = ? AND band = ? AND bucket = ?",
+                    (section_num, band, bucket)
+                ))
+            candidates.discard(exclude_id)
+            best = None
+            for question_id in candidates:
+                row = self._conn.execute(
+                    "SELECT signature FROM signatures WHERE question_id = ?", (question_id,)
+                ).fetchone()
+                if row is None:
+                    continue
+                similarity = estimate_similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (question_id, similarity)
+            return best
+
+    def add(self, section_num: int, question_id: str, signature: np.ndarray):
+        """Store a question's signature and LSH buckets, replacing any previous ones"""
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets WHERE question_id = ?", (question_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (question_id, section, signature) VALUES (?, ?, ?)",
+                (question_id, section_num, signature.tobytes())
+            )
+            self._conn.executemany(
+                "INSERT INTO buckets (section, band, bucket, question_id) VALUES (?, ?, ?, ?)",
+                [(section_num, band, bucket, question_id) for band, bucket in band_keys(signature, self.bands)]
+            )
+            # A question that is stored in its own right is no longer an alias
+            self._conn.execute("DELETE FROM aliases WHERE duplicate_id = ?", (question_id,))
+            self._conn.commit()
+
+    def add_alias(self, duplicate_id: str, canonical_id: str, similarity: float):
+        """Record that a question was merged into a near-identical stored question"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO aliases (duplicate_id, canonical_id, similarity) VALUES (?, ?, ?)",
+                (duplicate_id, canonical_id, similarity)
+            )
+            self._conn.commit()
+
+    def aliases(self, canonical_id: str) -> List[str]:
+        """List the question IDs merged into a stored question"""
+        with self._lock:
+            return [duplicate_id for (duplicate_id,) in self._conn.execute(
+                "SELECT duplicate_id FROM aliases WHERE canonical_id = ? ORDER BY duplicate_id",
+                (canonical_id,)
+            )]
+
+    def canonical_id(self, question_id: str) -> Optional[str]:
+        """Return the stored question an alias was merged into, if any"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT canonical_id FROM aliases WHERE duplicate_id = ?", (question_id,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def remove(self, question_ids: Iterable[str]):
+        """Forget questions, along with aliases pointing at or from them"""
+        rows = [(question_id,) for question_id in question_ids]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM signatures WHERE question_id = ?", rows)
+            self._conn.executemany("DELETE FROM buckets WHERE question_id = ?", rows)
+            self._conn.executemany("DELETE FROM aliases WHERE duplicate_id = ? OR canonical_id = ?",
+                                   [(question_id, question_id) for (question_id,) in rows])
+            self._conn.commit()
+
+
+def find_duplicate_clusters(
+    items: Iterable[Tuple[str, str]],
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    bands: int = 16
+) -> List[List[str]]:
+    """Group (question_id, text) pairs into clusters of near-duplicates
+
+    Runs entirely in memory, so it also works on collections indexed before
+    signatures were stored. Returns clusters of two or more IDs, largest first.
+    """
+    hasher = MinHasher(num_perm=num_perm)
+    signatures: Dict[str, np.ndarray] = {}
+    buckets: Dict[Tuple[int, int], List[str]] = {}
+    for question_id, text in items:
+        signature = hasher.signature(text)
+        if signature is None:
+            continue
+        signatures[question_id] = signature
+        for key in band_keys(signature, bands):
+            buckets.setdefault(key, []).append(question_id)
+
+    parent = {question_id: question_id for question_id in signatures}
+
+    def find(question_id: str) -> str:
+        while parent[question_id] != question_id:
+            parent[question_id] = parent[parent[question_id]]
+            question_id = parent[question_id]
+        return question_id
+
+    checked = set()
+    for members in buckets.values():
+        for i, first in enumerate(members):
+            for second in members[i + 1:]:
+                pair = (first, second) if first < second else (second, first)
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if estimate_similarity(signatures[first], signatures[second]) >= threshold:
+                    parent[find(first)] = find(second)
+
+    clusters: Dict[str, List[str]] = {}
+    for question_id in signatures:
+        clusters.setdefault(find(question_id), []).append(question_id)
+    return sorted(
+        (sorted(members) for members in clusters.values() if len(members) > 1),
+        key=len,
+        reverse=True
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List clusters of near-duplicate questions in the vector store")
+    parser.add_argument("--persist-directory", default="backend/data/vector_store")
+    parser.add_argument("--backend", choices=["openai", "local"], default=None,
+                        help="Embedding backend whose questions to scan (defaults to EMBEDDING_BACKEND or openai)")
+    parser.add_argument("--quantized", action="store_true",
+                        help="Scan the questions of the quantized collections")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Minimum estimated Jaccard similarity")
+    parser.add_argument("--sections", type=int, nargs="+", default=[2, 3])
+    args = parser.parse_args()
+
+    # Imported here because the vector store itself depends on this module
+    from backend.lexical_index import lexical_text
+
+    # Only the docstore is opened, so no embedding backend or API key is needed
+    backend = args.backend or os.getenv("EMBEDDING_BACKEND", "openai")
+    suffix = "" if backend == "openai" else f"_{backend}"
+    if args.quantized:
+        suffix += "_quantized"
+    path = os.path.join(args.persist_directory, f"docstore{suffix}.sqlite3")
+    if not os.path.exists(path):
+        print(f"No docstore found at {path}")
+        return
+    docstore = QuestionDocStore(path)
+    for section_num in args.sections:
+        questions = dict(docstore.iter_section(section_num))
+        clusters = find_duplicate_clusters(
+            ((question_id, lexical_text(question)) for question_id, question in questions.items()),
+            threshold=args.threshold
+        )
+        duplicates = sum(len(cluster) - 1 for cluster in clusters)
+        print(f"Section {section_num}: {len(questions)} questions, {len(clusters)} duplicate clusters, "
+              f"{duplicates} redundant questions")
+        for cluster in clusters:
+            preview = lexical_text(questions[cluster[0]]).replace("\n", " ")[:60]
+            print(f"  [{len(cluster)}] {', '.join(cluster)}")
+            print(f"      {preview}")
+    docstore.close()
+
+
+if __name__ == "__main__":
+    main()
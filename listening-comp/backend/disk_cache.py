@@ -0,0 +1,175 @@
+import hashlib
+import time
+import unicodedata
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from backend.sqlite_store import SQLiteStore, batched
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys (NFKC, trimmed, collapsed whitespace)"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class DiskLRUCache(SQLiteStore):
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """Initialize a persistent key/value cache backed by SQLite
+
+        Values are raw bytes. Once the cache holds more than `max_entries`
+        entries, the least recently used ones are evicted.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache(last_access);
+        """)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Return the cached values for whichever of `keys` are present"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for chunk in batched(keys):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM cache WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE cache SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for `key`, or None"""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items: Dict[str, bytes]):
+        """Store values and evict least recently used entries over the cap"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, last_access) VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in items.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, key: str, value: bytes):
+        """Store a single value"""
+        self.put_many({key: value})
+
+    def _evict(self):
+        """Drop the least recently used entries beyond max_entries"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """Initialize an on-disk embedding cache
+
+        Embeddings are stored as float32 blobs keyed by (model name, hash of
+        the normalized text).
+        """
+        self._store = DiskLRUCache(path, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """Build the content-addressed key for a text under a model"""
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Return cached embeddings for `texts`, keyed by the original text"""
+        keys = {text: self.make_key(model, text) for text in texts}
+        blobs = self._store.get_many(keys.values())
+        embeddings = {}
+        for text, key in keys.items():
+            blob = blobs.get(key)
+            if blob is not None:
+                vector = array("f")
+                vector.frombytes(blob)
+                embeddings[text] = vector.tolist()
+        return embeddings
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Store embeddings, keyed by the original text"""
+        self._store.put_many({
+            self.make_key(model, text): array("f", embedding).tobytes()
+            for text, embedding in embeddings.items()
+        })
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def close(self):
+        """Close the underlying cache"""
+        self._store.close()
+
+
+class ResponseCache:
+    def __init__(self, path: str, max_entries: int = 10_000):
+        """Initialize an on-disk cache of LLM completions
+
+        Responses are keyed by a hash of everything that determines them: the
+        model, sampling settings, system prompt and the input text.
+        """
+        self._store = DiskLRUCache(path, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(model: str, temperature: float, max_tokens: int, prompt: str, text: str, tag: str = "") -> str:
+        """Build the content-addressed key for one completion request"""
+        prompt_digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        text_digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{model}:{temperature}:{max_tokens}:{tag}:{prompt_digest}:{text_digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text, or None"""
+        value = self._store.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def put(self, key: str, response: str):
+        """Store a response text"""
+        self._store.put(key, response.encode("utf-8"))
+
+    def clear(self):
+        """Remove every cached response"""
+        self._store.clear()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def close(self):
+        """Close the underlying cache"""
+        self._store.close()
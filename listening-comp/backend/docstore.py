@@ -0,0 +1,98 @@
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from backend.sqlite_store import SQLiteStore, batched
+
+
+def encode_question(question: Dict) -> bytes:
+    """Serialize a question as compact, zlib-compressed JSON"""
+    payload = json.dumps(question, ensure_ascii=False, separators=(',', ':'))
+    return zlib.compress(payload.encode('utf-8'))
+
+
+def decode_question(blob: bytes) -> Dict:
+    """Inverse of encode_question"""
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+class QuestionDocStore(SQLiteStore):
+    def __init__(self, path: str):
+        """Initialize a side store holding full question structures by ID
+
+        Questions are kept as compressed blobs and only decoded for the IDs
+        that are actually requested, so the vector index only needs to hold
+        small filterable fields.
+        """
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS questions (
+                question_id TEXT PRIMARY KEY,
+                section INTEGER NOT NULL,
+                body BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_questions_section ON questions(section);
+        """)
+
+    def put_many(self, section_num: int, questions: Iterable[Tuple[str, Dict]]):
+        """Store (question_id, question) pairs, replacing existing ones"""
+        rows = [(question_id, section_num, encode_question(question)) for question_id, question in questions]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO questions (question_id, section, body) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def get_many(self, question_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Return the stored questions for whichever IDs are present"""
+        question_ids = list(dict.fromkeys(question_ids))
+        blobs = {}
+        with self._lock:
+            for chunk in batched(question_ids):
+                placeholders = ",".join("?" * len(chunk))
+                blobs.update(self._conn.execute(
+                    f"SELECT question_id, body FROM questions WHERE question_id IN ({placeholders})",
+                    chunk
+                ).fetchall())
+        # Decode outside the lock so concurrent readers are not serialized on JSON parsing
+        return {question_id: decode_question(blob) for question_id, blob in blobs.items()}
+
+    def get(self, question_id: str) -> Optional[Dict]:
+        """Return a single question, or None"""
+        return self.get_many([question_id]).get(question_id)
+
+    def delete(self, question_ids: Iterable[str]):
+        """Remove questions by ID"""
+        rows = [(question_id,) for question_id in question_ids]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM questions WHERE question_id = ?", rows)
+            self._conn.commit()
+
+    def iter_section(self, section_num: int, batch_size: int = 1000) -> Iterator[Tuple[str, Dict]]:
+        """Yield every (question_id, question) pair stored for a section"""
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT question_id, body FROM questions WHERE section = ? AND question_id > ? "
+                    "ORDER BY question_id LIMIT ?",
+                    (section_num, last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for question_id, blob in rows:
+                yield question_id, decode_question(blob)
+            last_id = rows[-1][0]
+
+    def count(self, section_num: Optional[int] = None) -> int:
+        """Count stored questions, optionally for one section"""
+        with self._lock:
+            if section_num is None:
+                return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM questions WHERE section = ?", (section_num,)
+            ).fetchone()[0]
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.atomic_write import write_atomic
+
+
+def file_sha256(filename: str) -> str:
+    """Hash a file's contents"""
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def question_hash(question: Dict) -> str:
+    """Hash a parsed question so changes to any field are detected"""
+    payload = json.dumps(question, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IndexManifest:
+    def __init__(self, path: str):
+        """Initialize the manifest of indexed question files
+
+        For each file it records the content hash, mtime and size, plus the
+        content hash of every question indexed from it, so unchanged files can
+        be skipped and changed files re-indexed question by question.
+        """
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        self.load()
+
+    @staticmethod
+    def key(filename: str) -> str:
+        """Normalize a filename into a manifest key"""
+        return os.path.abspath(filename)
+
+    def load(self):
+        """Load the manifest from disk, starting empty if it is missing or corrupt"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except FileNotFoundError:
+            self.files = {}
+        except Exception as e:
+            print(f"Error loading index manifest {self.path}: {str(e)}")
+            self.files = {}
+
+    def save(self):
+        """Write the manifest atomically"""
+        write_atomic(self.path, json.dumps({'files': self.files}, ensure_ascii=False).encode('utf-8'))
+
+    def get(self, filename: str) -> Optional[Dict]:
+        """Return the manifest entry for a file, if any"""
+        return self.files.get(self.key(filename))
+
+    def is_unchanged(self, filename: str, stat: os.stat_result) -> bool:
+        """Check a file against its entry using only mtime and size"""
+        entry = self.get(filename)
+        return bool(entry) and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size
+
+    def update(
+        self,
+        filename: str,
+        stat: os.stat_result,
+        sha256: str,
+        section_num: int,
+        video_id: str,
+        questions: Dict[str, str]
+    ):
+        """Record a file as indexed with the given question hashes"""
+        self.files[self.key(filename)] = {
+            'sha256': sha256,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'section': section_num,
+            'video_id': video_id,
+            'questions': questions
+        }
+
+    def remove(self, filename: str) -> Optional[Dict]:
+        """Drop a file's entry and return it"""
+        return self.files.pop(self.key(filename), None)
+
+    def forget_questions(self, question_ids: Iterable[str]) -> List[Tuple[str, int]]:
+        """Drop questions from their files' entries and mark those files for re-indexing
+
+        Returns the (key, section) of every affected file.
+        """
+        question_ids = set(question_ids)
+        affected = []
+        for key, entry in self.files.items():
+            forgotten = question_ids.intersection(entry['questions'])
+            if forgotten:
+                for question_id in forgotten:
+                    del entry['questions'][question_id]
+                # Neither the mtime nor the hash check may treat the file as unchanged
+                entry['mtime'] = None
+                entry['sha256'] = ""
+                affected.append((key, entry['section']))
+        return affected
+
+    def files_under(self, directory: str) -> List[str]:
+        """List manifest keys for files inside a directory"""
+        prefix = os.path.join(os.path.abspath(directory), '')
+        return [key for key in self.files if key.startswith(prefix)]
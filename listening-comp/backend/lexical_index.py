@@ -0,0 +1,145 @@
+import heapq
+import json
+import math
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from backend.sqlite_store import SQLiteStore
+
+# Question fields that carry searchable Japanese text
+LEXICAL_FIELDS = ['Introduction', 'Situation', 'Conversation', 'Question']
+
+
+def char_bigrams(text: str) -> List[str]:
+    """Split text into overlapping character bigrams
+
+    Japanese has no spaces between words, so bigrams stand in for terms.
+    Whitespace is dropped and a single remaining character is its own term.
+    """
+    normalized = "".join(unicodedata.normalize("NFKC", text).lower().split())
+    if len(normalized) < 2:
+        return [normalized] if normalized else []
+    return [normalized[i:i + 2] for i in range(len(normalized) - 1)]
+
+
+def lexical_text(question: Dict) -> str:
+    """Join the searchable fields of a question"""
+    return "\n".join(str(question[field]) for field in LEXICAL_FIELDS if question.get(field))
+
+
+class BM25Index(SQLiteStore):
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        """Initialize a BM25 inverted index over character bigrams
+
+        Per-document term counts are persisted in SQLite so updates are
+        incremental; the in-memory postings are built from them on first search.
+        """
+        self.k1 = k1
+        self.b = b
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL,
+                terms TEXT NOT NULL
+            );
+        """)
+
+        self._loaded = False
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._total_length = 0
+
+    def _load(self):
+        """Build in-memory postings from the persisted documents"""
+        for doc_id, length, terms in self._conn.execute("SELECT doc_id, length, terms FROM docs"):
+            self._index_doc(doc_id, json.loads(terms), length)
+        self._loaded = True
+
+    def _index_doc(self, doc_id: str, terms: Dict[str, int], length: int):
+        """Add a document to the in-memory postings"""
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _unindex_doc(self, doc_id: str):
+        """Remove a document from the in-memory postings"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+
+    def upsert(self, docs: Iterable[Tuple[str, str]]):
+        """Index or re-index (doc_id, text) pairs"""
+        rows = []
+        for doc_id, text in docs:
+            tokens = char_bigrams(text)
+            rows.append((doc_id, len(tokens), dict(Counter(tokens))))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs (doc_id, length, terms) VALUES (?, ?, ?)",
+                [(doc_id, length, json.dumps(terms, ensure_ascii=False)) for doc_id, length, terms in rows]
+            )
+            self._conn.commit()
+            if self._loaded:
+                for doc_id, length, terms in rows:
+                    self._unindex_doc(doc_id)
+                    self._index_doc(doc_id, terms, length)
+
+    def delete(self, doc_ids: Iterable[str]):
+        """Remove documents from the index"""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM docs WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+            self._conn.commit()
+            if self._loaded:
+                for doc_id in doc_ids:
+                    self._unindex_doc(doc_id)
+
+    def clear(self):
+        """Remove every document"""
+        with self._lock:
+            self._conn.execute("DELETE FROM docs")
+            self._conn.commit()
+            self._postings, self._doc_terms, self._doc_lengths = {}, {}, {}
+            self._total_length = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query: str, n_results: int = 5) -> List[Tuple[str, float]]:
+        """Return the top (doc_id, BM25 score) pairs for a query"""
+        query_terms = Counter(char_bigrams(query))
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            doc_count = len(self._doc_lengths)
+            if not doc_count or not query_terms:
+                return []
+            avg_length = self._total_length / doc_count
+
+            scores: Dict[str, float] = {}
+            for term, query_tf in query_terms.items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,71 @@
+import unicodedata
+from typing import List, Tuple
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+# Multiplier for rolling n-gram hashes and the finalizer constant from splitmix64
+_NGRAM_PRIME = np.uint64(0x100000001B3)
+_MIX_MULTIPLIER = np.uint64(0xBF58476D1CE4E5B9)
+
+
+class LocalNGramEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    def __init__(self, dimensions: int = 512, ngram_range: Tuple[int, int] = (1, 3)):
+        """Initialize an offline embedding function based on hashed character n-grams
+
+        Japanese text has no word boundaries, so texts are embedded as bags of
+        character n-grams hashed into a fixed number of dimensions. Vectors use
+        sublinear term frequency and are L2-normalized, so cosine and L2
+        distances rank the same way. No network access or model files are needed.
+        """
+        min_n, max_n = ngram_range
+        if dimensions < 1 or min_n < 1 or max_n < min_n:
+            raise ValueError("Invalid dimensions or ngram_range")
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        self.model = f"local-ngram-{min_n}-{max_n}-{dimensions}"
+
+    def _ngram_hashes(self, text: str) -> np.ndarray:
+        """Hash every character n-gram of the normalized text"""
+        normalized = "".join(unicodedata.normalize("NFKC", text).lower().split())
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+        hashes = []
+        min_n, max_n = self.ngram_range
+        with np.errstate(over="ignore"):
+            for n in range(min_n, max_n + 1):
+                count = len(codes) - n + 1
+                if count <= 0:
+                    break
+                # Seed each n-gram length differently so "ab" and "a"+"b" do not collide
+                h = np.full(count, n, dtype=np.uint64)
+                for offset in range(n):
+                    h = h * _NGRAM_PRIME + codes[offset:offset + count]
+                h ^= h >> np.uint64(31)
+                h *= _MIX_MULTIPLIER
+                h ^= h >> np.uint64(29)
+                hashes.append(h)
+        if not hashes:
+            return np.empty(0, dtype=np.uint64)
+        return np.concatenate(hashes)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed a single text as a float32 vector"""
+        hashes = self._ngram_hashes(text)
+        if hashes.size == 0:
+            return np.zeros(self.dimensions, dtype=np.float32)
+
+        # The top bit picks the sign, which keeps hash collisions unbiased
+        buckets = (hashes % np.uint64(self.dimensions)).astype(np.int64)
+        signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+        vector = np.bincount(buckets, weights=signs, minlength=self.dimensions)
+
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a list of texts locally"""
+        return [self.embed(text).tolist() for text in texts]
@@ -0,0 +1,320 @@
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.sqlite_store import SQLiteStore
+
+# Supported quantized storage modes
+QUANTIZATION_MODES = ["float16", "int8"]
+
+# Rows scored per matrix multiply; the temporary float32 copy of a block
+# (1.5 MB at 1536 dimensions) would otherwise stay in the allocator and undo
+# the RAM saved by quantizing
+_SCORE_BLOCK = 256
+
+
+def quantize(vectors: np.ndarray, mode: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Quantize float32 rows, returning (codes, per-row scales or None)"""
+    if mode == "float16":
+        return vectors.astype(np.float16), None
+    if mode == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unknown quantization mode '{mode}'. Choose one of: {', '.join(QUANTIZATION_MODES)}")
+
+
+def recall_at_k(exact: Sequence[Sequence[str]], approximate: Sequence[Sequence[str]], k: int) -> float:
+    """Mean fraction of the exact top-k IDs that the approximate top-k also returned"""
+    if not exact:
+        return 0.0
+    total = 0.0
+    for exact_ids, approximate_ids in zip(exact, approximate):
+        truth = set(exact_ids[:k])
+        if truth:
+            total += len(truth & set(approximate_ids[:k])) / len(truth)
+        else:
+            total += 1.0
+    return total / len(exact)
+
+
+class QuantizedVectorIndex(SQLiteStore):
+    def __init__(self, path_prefix: str, mode: str = "int8", rescore_factor: int = 4):
+        """Initialize an in-process vector index with quantized storage
+
+        Only the float16 or int8 codes (plus per-row scales and squared norms)
+        are held in RAM. Full-precision float32 rows live in a memory-mapped
+        file and are read only to re-score the top `k * rescore_factor`
+        candidates, so rankings and squared L2 distances match an exact
+        search for the final top-k.
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode '{mode}'. Choose one of: {', '.join(QUANTIZATION_MODES)}")
+        self.path_prefix = path_prefix
+        self.mode = mode
+        self.rescore_factor = max(1, rescore_factor)
+        self._codes_path = f"{path_prefix}.{mode}"
+        self._scales_path = f"{path_prefix}.scales"
+        self._norms_path = f"{path_prefix}.norms"
+        self._full_path = f"{path_prefix}.f32"
+
+        super().__init__(f"{path_prefix}.ids.sqlite3", """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS rows (question_id TEXT PRIMARY KEY, row INTEGER NOT NULL);
+        """)
+
+        self._load()
+
+    def _load(self):
+        """Read the ID mapping and the quantized rows into memory"""
+        meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.dimensions = int(meta["dimensions"]) if "dimensions" in meta else None
+
+        rows = self._conn.execute("SELECT question_id, row FROM rows ORDER BY row").fetchall()
+        self._ids: List[str] = [question_id for question_id, _ in rows]
+        self._rows: Dict[str, int] = {question_id: row for question_id, row in rows}
+        self._size = len(self._ids)
+        self._full = None
+
+        if self.dimensions is None:
+            self._codes = self._scales = self._norms = None
+            return
+        code_dtype = np.float16 if self.mode == "float16" else np.int8
+        codes = np.fromfile(self._codes_path, dtype=code_dtype) if os.path.exists(self._codes_path) else np.empty(0, code_dtype)
+        self._codes = codes.reshape(-1, self.dimensions)[:self._size].copy()
+        self._norms = self._read_rows(self._norms_path)
+        self._scales = self._read_rows(self._scales_path) if self.mode == "int8" else None
+
+    def _read_rows(self, path: str) -> np.ndarray:
+        """Read a per-row float32 file"""
+        if not os.path.exists(path):
+            return np.empty(0, dtype=np.float32)
+        return np.fromfile(path, dtype=np.float32)[:self._size].copy()
+
+    def _ensure_capacity(self, size: int):
+        """Grow the in-memory arrays geometrically to hold `size` rows"""
+        if self._codes is not None and len(self._codes) >= size:
+            return
+        capacity = max(size, 2 * (len(self._codes) if self._codes is not None else 0), 1024)
+        code_dtype = np.float16 if self.mode == "float16" else np.int8
+        codes = np.zeros((capacity, self.dimensions), dtype=code_dtype)
+        norms = np.zeros(capacity, dtype=np.float32)
+        scales = np.ones(capacity, dtype=np.float32)
+        if self._codes is not None:
+            used = len(self._codes)
+            codes[:used] = self._codes
+            norms[:used] = self._norms
+            if self._scales is not None:
+                scales[:used] = self._scales
+        self._codes, self._norms = codes, norms
+        self._scales = scales if self.mode == "int8" else None
+
+    @staticmethod
+    def _write_row(handle, row: int, data: np.ndarray):
+        """Write one row's bytes at its offset in a row file"""
+        raw = data.tobytes()
+        handle.seek(row * len(raw))
+        handle.write(raw)
+
+    def _open_files(self) -> Dict[str, object]:
+        """Open every row file for in-place writes, creating missing ones"""
+        paths = {"codes": self._codes_path, "norms": self._norms_path, "full": self._full_path}
+        if self.mode == "int8":
+            paths["scales"] = self._scales_path
+        handles = {}
+        for name, path in paths.items():
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            handles[name] = open(path, "r+b")
+        return handles
+
+    def upsert(self, question_ids: List[str], vectors: Iterable[Sequence[float]]):
+        """Insert or replace full-precision vectors by ID"""
+        if not question_ids:
+            return
+        vectors = np.asarray([np.asarray(vector, dtype=np.float32) for vector in vectors], dtype=np.float32)
+        with self._lock:
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dimensions', ?)",
+                                   (str(self.dimensions),))
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {vectors.shape[1]}")
+
+            codes, scales = quantize(vectors, self.mode)
+            norms = np.einsum("ij,ij->i", vectors, vectors)
+
+            new_rows = []
+            positions = []
+            for question_id in question_ids:
+                row = self._rows.get(question_id)
+                if row is None:
+                    row = self._size
+                    self._rows[question_id] = row
+                    self._ids.append(question_id)
+                    self._size += 1
+                    new_rows.append((question_id, row))
+                positions.append(row)
+            self._ensure_capacity(self._size)
+
+            handles = self._open_files()
+            try:
+                for i, row in enumerate(positions):
+                    self._codes[row] = codes[i]
+                    self._norms[row] = norms[i]
+                    self._write_row(handles["codes"], row, codes[i])
+                    self._write_row(handles["norms"], row, norms[i:i + 1])
+                    self._write_row(handles["full"], row, vectors[i])
+                    if scales is not None:
+                        self._scales[row] = scales[i]
+                        self._write_row(handles["scales"], row, scales[i:i + 1])
+            finally:
+                for handle in handles.values():
+                    handle.close()
+
+            self._conn.executemany("INSERT OR REPLACE INTO rows (question_id, row) VALUES (?, ?)", new_rows)
+            self._conn.commit()
+            self._full = None
+
+    def delete(self, question_ids: Iterable[str]):
+        """Remove vectors by ID, moving the last row into each freed slot"""
+        with self._lock:
+            targets = [question_id for question_id in question_ids if question_id in self._rows]
+            if not targets:
+                return
+            full = self._full_matrix()
+            # Full-precision rows that moved, written once every source row has been read:
+            # a row moved earlier in this call may be moved again, and the memmap does not
+            # see writes still buffered in the file handle
+            moved_full: Dict[int, np.ndarray] = {}
+            handles = self._open_files()
+            try:
+                for question_id in targets:
+                    row = self._rows.pop(question_id)
+                    last = self._size - 1
+                    if row != last:
+                        moved_id = self._ids[last]
+                        self._ids[row] = moved_id
+                        self._rows[moved_id] = row
+                        self._codes[row] = self._codes[last]
+                        self._norms[row] = self._norms[last]
+                        self._write_row(handles["codes"], row, self._codes[row])
+                        self._write_row(handles["norms"], row, self._norms[row:row + 1])
+                        moved_full[row] = moved_full.pop(last) if last in moved_full else np.array(full[last])
+                        if self._scales is not None:
+                            self._scales[row] = self._scales[last]
+                            self._write_row(handles["scales"], row, self._scales[row:row + 1])
+                        self._conn.execute("UPDATE rows SET row = ? WHERE question_id = ?", (row, moved_id))
+                    moved_full.pop(last, None)
+                    self._ids.pop()
+                    self._size -= 1
+                    self._conn.execute("DELETE FROM rows WHERE question_id = ?", (question_id,))
+                for row, vector in moved_full.items():
+                    self._write_row(handles["full"], row, vector)
+            finally:
+                for handle in handles.values():
+                    handle.close()
+            del full
+            self._full = None
+
+            # Trim the row files to the live rows
+            row_bytes = {
+                self._codes_path: self._codes.itemsize * self.dimensions,
+                self._norms_path: 4,
+                self._full_path: 4 * self.dimensions
+            }
+            if self.mode == "int8":
+                row_bytes[self._scales_path] = 4
+            for path, size in row_bytes.items():
+                os.truncate(path, self._size * size)
+            self._conn.commit()
+
+    def _full_matrix(self) -> np.ndarray:
+        """Memory-map the full-precision rows"""
+        if self._full is None:
+            if not self._size:
+                return np.empty((0, self.dimensions or 0), dtype=np.float32)
+            self._full = np.memmap(self._full_path, dtype=np.float32, mode="r", shape=(self._size, self.dimensions))
+        return self._full
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate squared L2 distance from the query to every row"""
+        dots = np.empty(self._size, dtype=np.float32)
+        for start in range(0, self._size, _SCORE_BLOCK):
+            end = min(start + _SCORE_BLOCK, self._size)
+            dots[start:end] = self._codes[start:end].astype(np.float32) @ query
+        if self._scales is not None:
+            dots *= self._scales[:self._size]
+        return self._norms[:self._size] - 2 * dots + float(query @ query)
+
+    def search(self, query_vector: Sequence[float], n_results: int = 5, rescore: bool = True) -> List[Tuple[str, float]]:
+        """Return the nearest (question_id, squared L2 distance) pairs
+
+        With `rescore=False` the ranking and distances come from the quantized
+        codes alone.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            if not self._size or n_results < 1:
+                return []
+            approximate = self._approximate_scores(query)
+            if not rescore:
+                top = np.argsort(approximate, kind="stable")[:n_results]
+                return [(self._ids[row], float(approximate[row])) for row in top]
+
+            candidates = min(self._size, n_results * self.rescore_factor)
+            if candidates < self._size:
+                candidate_rows = np.argpartition(approximate, candidates - 1)[:candidates]
+            else:
+                candidate_rows = np.arange(self._size)
+
+            # Re-score candidates on full precision rows read from disk
+            candidate_rows.sort()
+            full = self._full_matrix()[candidate_rows]
+            distances = ((full - query) ** 2).sum(axis=1)
+            order = np.argsort(distances, kind="stable")[:n_results]
+            return [(self._ids[candidate_rows[i]], float(distances[i])) for i in order]
+
+    def exact_search(self, query_vector: Sequence[float], n_results: int = 5) -> List[Tuple[str, float]]:
+        """Brute-force search over the full-precision rows, for measuring recall"""
+        query = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            if not self._size or n_results < 1:
+                return []
+            full = self._full_matrix()
+            distances = np.empty(self._size, dtype=np.float32)
+            for start in range(0, self._size, _SCORE_BLOCK):
+                end = min(start + _SCORE_BLOCK, self._size)
+                distances[start:end] = ((full[start:end] - query) ** 2).sum(axis=1)
+            top = np.argsort(distances, kind="stable")[:n_results]
+            return [(self._ids[row], float(distances[row])) for row in top]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_bytes(self) -> int:
+        """Bytes of vector data held in RAM for the live rows"""
+        if not self._size:
+            return 0
+        total = self._codes[:self._size].nbytes + self._norms[:self._size].nbytes
+        if self._scales is not None:
+            total += self._scales[:self._size].nbytes
+        return total
+
+    def clear(self):
+        """Remove every vector"""
+        with self._lock:
+            self._conn.execute("DELETE FROM rows")
+            self._conn.commit()
+            for path in [self._codes_path, self._scales_path, self._norms_path, self._full_path]:
+                if os.path.exists(path):
+                    os.truncate(path, 0)
+            self._ids, self._rows, self._size = [], {}, 0
+            self._full = None
+
+    def close(self):
+        """Release the memory map and close the underlying database connection"""
+        self._full = None
+        super().close()
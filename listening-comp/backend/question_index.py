@@ -0,0 +1,149 @@
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.sqlite_store import SQLiteStore
+
+# Header fields of a saved question set, as returned by list_saved_questions
+METADATA_FIELDS = ['filename', 'video_id', 'timestamp', 'practice_type', 'topic']
+# Columns a query can be sorted by; timestamp then filename break ties so page
+# boundaries are stable and the order matches the (column, timestamp, filename) indexes
+SORT_FIELDS = ['timestamp', 'video_id', 'practice_type', 'topic']
+
+
+def _sort_key(sort_by: str) -> List[str]:
+    """Return the columns a query sorted by `sort_by` is ordered on"""
+    if sort_by == 'timestamp':
+        return ['timestamp', 'filename']
+    return [sort_by, 'timestamp', 'filename']
+
+
+class QuestionSetIndex(SQLiteStore):
+    def __init__(self, path: str):
+        """Initialize a SQLite index of saved question set headers
+
+        Listing saved sets reads only this index instead of opening every
+        file; QuestionStore keeps it in step with saves and deletes.
+        """
+        super().__init__(path, """
+            CREATE TABLE IF NOT EXISTS question_sets (
+                filename TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                practice_type TEXT NOT NULL,
+                topic TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_question_sets_timestamp ON question_sets(timestamp, filename);
+            CREATE INDEX IF NOT EXISTS idx_question_sets_video ON question_sets(video_id, timestamp, filename);
+            CREATE INDEX IF NOT EXISTS idx_question_sets_practice ON question_sets(practice_type, timestamp, filename);
+            CREATE INDEX IF NOT EXISTS idx_question_sets_topic ON question_sets(topic, timestamp, filename);
+        """)
+
+    def upsert(self, entries: Iterable[Dict]):
+        """Add or replace the headers of saved question sets"""
+        rows = [tuple(entry[field] for field in METADATA_FIELDS) for entry in entries]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO question_sets "
+                "(filename, video_id, timestamp, practice_type, topic) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def delete(self, filename: str):
+        """Remove a question set from the index"""
+        with self._lock:
+            self._conn.execute("DELETE FROM question_sets WHERE filename = ?", (filename,))
+            self._conn.commit()
+
+    def replace_all(self, entries: Iterable[Dict]):
+        """Replace the whole index in one transaction"""
+        rows = [tuple(entry[field] for field in METADATA_FIELDS) for entry in entries]
+        with self._lock:
+            self._conn.execute("DELETE FROM question_sets")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO question_sets "
+                "(filename, video_id, timestamp, practice_type, topic) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def list_all(self) -> List[Dict]:
+        """Return every header, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, video_id, timestamp, practice_type, topic FROM question_sets "
+                "ORDER BY timestamp DESC, filename DESC"
+            ).fetchall()
+        return [dict(zip(METADATA_FIELDS, row)) for row in rows]
+
+    def query(
+        self,
+        filters: Optional[Dict[str, str]] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        sort_by: str = 'timestamp',
+        descending: bool = True,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Return one page of headers and the cursor of the next page (None at the end)
+
+        `filters` maps header fields to exact values; `since`/`until` bound
+        the timestamp inclusively. Pages are fetched by keyset on
+        (sort_by, timestamp, filename), so deep pages cost the same as the first.
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {SORT_FIELDS}")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if field not in METADATA_FIELDS:
+                raise ValueError(f"Unknown filter field: {field}")
+            clauses.append(f"{field} = ?")
+            params.append(value)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp <= ?")
+            params.append(until)
+        key = _sort_key(sort_by)
+        comparison = "<" if descending else ">"
+        if cursor is not None:
+            values = json.loads(cursor)
+            placeholders = ", ".join("?" for _ in key)
+            clauses.append(f"({', '.join(key)}) {comparison} ({placeholders})")
+            params.extend(values)
+
+        direction = "DESC" if descending else "ASC"
+        sql = "SELECT filename, video_id, timestamp, practice_type, topic FROM question_sets"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in key) + " LIMIT ?"
+        # Fetch one extra row to know whether another page follows
+        params.append(limit + 1)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        page = [dict(zip(METADATA_FIELDS, row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = json.dumps([last[column] for column in key], ensure_ascii=False)
+        return page, next_cursor
+
+    def distinct(self, field: str) -> List[str]:
+        """Return the distinct values of a header field, sorted"""
+        if field not in METADATA_FIELDS:
+            raise ValueError(f"Unknown field: {field}")
+        with self._lock:
+            return [value for (value,) in self._conn.execute(
+                f"SELECT DISTINCT {field} FROM question_sets ORDER BY {field}"
+            )]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM question_sets").fetchone()[0]
@@ -0,0 +1,174 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from backend.dedup import MinHasher, estimate_similarity
+
+# Field headers in structured question blocks, optionally followed by inline text
+FIELD_PATTERN = re.compile(r'^(Introduction|Conversation|Situation|Question|Options):\s*(.*)$')
+# Option lines such as "1. 駅", "２．駅" or "3) 駅"
+OPTION_PATTERN = re.compile(r'^[0-9０-９]+\s*[.．)）、]\s*(.*)$')
+
+QUESTION_OPEN = '<question>'
+QUESTION_CLOSE = '</question>'
+TAG_PATTERN = re.compile(r'(</?question>)')
+QUESTION_BLOCK_PATTERN = re.compile(r'<question>.*?</question>', re.DOTALL)
+
+
+class _QuestionBuilder:
+    def __init__(self):
+        """Accumulate the fields of one question block"""
+        self.fields: Dict[str, List[str]] = {}
+        self.current: Optional[str] = None
+
+    def add_line(self, line: str):
+        """Feed one stripped line from inside the block"""
+        match = FIELD_PATTERN.match(line)
+        if match:
+            self.current = match.group(1)
+            self.fields.setdefault(self.current, [])
+            line = match.group(2).strip()
+        if self.current is None or not line:
+            return
+        if self.current == 'Options':
+            option = OPTION_PATTERN.match(line)
+            if option:
+                self.fields['Options'].append(option.group(1).strip())
+            elif self.fields['Options']:
+                # Continuation of a long option
+                self.fields['Options'][-1] += f" {line}"
+        else:
+            self.fields[self.current].append(line)
+
+    def build(self) -> Dict:
+        """Return the question, joining multi-line fields with newlines"""
+        question = {}
+        for field, lines in self.fields.items():
+            question[field] = lines if field == 'Options' else "\n".join(lines)
+        return question
+
+
+def iter_questions(lines: Iterable[str]) -> Iterator[Dict]:
+    """Yield questions from structured text as each <question> block closes
+
+    Fields may span several lines; they are joined with newlines. Text outside
+    blocks is ignored, and a block that is never closed is dropped.
+    """
+    builder = None
+    for raw_line in lines:
+        # Tags are usually on their own line, but concatenated dumps can glue them to text
+        for token in TAG_PATTERN.split(raw_line.strip()):
+            token = token.strip()
+            if token == QUESTION_OPEN:
+                builder = _QuestionBuilder()
+            elif token == QUESTION_CLOSE:
+                if builder is not None:
+                    question = builder.build()
+                    if question:
+                        yield question
+                builder = None
+            elif builder is not None:
+                builder.add_line(token)
+
+
+def iter_questions_from_file(filename: str) -> Iterator[Dict]:
+    """Stream questions from a structured question file line by line"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        yield from iter_questions(f)
+
+
+def iter_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Re-split a stream of text chunks (e.g. LLM tokens) into complete lines"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split("\n")
+        yield from lines
+    if buffer:
+        yield buffer
+
+
+def parse_question_block(text: str) -> Optional[Dict]:
+    """Parse the first <question> block in a text, or None if there is none"""
+    return next(iter_questions(text.split("\n")), None)
+
+
+def format_question_block(question: Dict) -> str:
+    """Render a question back into the structured <question> text format"""
+    lines = [QUESTION_OPEN]
+    for field, value in question.items():
+        lines.append(f"{field}:")
+        if field == 'Options':
+            lines.extend(f"{i}. {option}" for i, option in enumerate(value, 1))
+        else:
+            lines.append(str(value))
+        lines.append("")
+    if len(lines) > 1:
+        lines.pop()
+    lines.append(QUESTION_CLOSE)
+    return "\n".join(lines)
+
+
+def question_content(question: Dict) -> str:
+    """Return the text that identifies a question when looking for duplicates
+
+    That is its introduction, conversation and situation. Labels, the
+    question prompt and options often repeat across different items (e.g.
+    every 問題3 item asks 何と言いますか), so they are only used when there is
+    nothing else.
+    """
+    parts = [str(question[field]) for field in ('Introduction', 'Conversation', 'Situation') if question.get(field)]
+    if not parts:
+        parts = [str(question.get('Question', ''))] + [str(option) for option in question.get('Options', [])]
+    return "\n".join(parts)
+
+
+class NearDuplicateFilter:
+    def __init__(self, threshold: float = 0.8):
+        """Remember texts and find near-duplicates of new ones among them"""
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.signatures = []
+
+    def match(self, text: str) -> Optional[int]:
+        """Return the position of a remembered near-duplicate of `text`, or None"""
+        signature = self.hasher.signature(text)
+        for i, other in enumerate(self.signatures):
+            if estimate_similarity(signature, other) >= self.threshold:
+                return i
+        return None
+
+    def add(self, text: str):
+        """Remember a non-empty text"""
+        self.signatures.append(self.hasher.signature(text))
+
+
+def merge_question_blocks(outputs: Iterable[str], threshold: float = 0.8) -> str:
+    """Merge the <question> blocks of several LLM outputs, dropping near-duplicates
+
+    `outputs` come from consecutive overlapping transcript windows, which
+    tend to yield the same question twice, once possibly cut short. A block
+    is only compared with the blocks of the previous output, by
+    question_content; of two whose estimated similarity reaches `threshold`
+    the longer one is kept, in the position of the first.
+    """
+    kept: List[str] = []
+    previous, previous_positions = NearDuplicateFilter(threshold), []
+    for output in outputs:
+        current, current_positions = NearDuplicateFilter(threshold), []
+        for block in QUESTION_BLOCK_PATTERN.findall(output):
+            question = parse_question_block(block)
+            text = question_content(question) if question else ""
+            if not text.strip():
+                continue
+            match = previous.match(text)
+            if match is None:
+                position = len(kept)
+                kept.append(block)
+            else:
+                position = previous_positions[match]
+                if len(block) > len(kept[position]):
+                    kept[position] = block
+            current.add(text)
+            current_positions.append(position)
+        previous, previous_positions = current, current_positions
+    return "\n\n".join(kept)
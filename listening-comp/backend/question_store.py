@@ -1,19 +1,134 @@
+import argparse
+import copy
+import gzip
 import os
 import json
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+from backend.atomic_write import write_atomic
+from backend.question_index import QuestionSetIndex
+from backend.lru_cache import LRUCache
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Name of the metadata index kept next to the saved question files
+INDEX_FILENAME = "index.sqlite3"
+# File extension for each supported compression (None stores pretty-printed JSON)
+COMPRESSION_EXTENSIONS = {None: ".json", "gzip": ".json.gz", "zstd": ".json.zst"}
+
+
+def is_question_file(filename: str) -> bool:
+    """Check whether a filename is a saved question set in any format"""
+    return filename.endswith(tuple(COMPRESSION_EXTENSIONS.values()))
+
+
+def encode_question_set(data: Dict, compression: Optional[str] = None) -> bytes:
+    """Serialize a question set in the given on-disk format"""
+    if compression is None:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if compression == "gzip":
+        return gzip.compress(payload, compresslevel=6)
+    return zstandard.ZstdCompressor(level=10).compress(payload)
+
+
+def read_question_set(filepath: str) -> Dict:
+    """Read a question set, decompressing it according to its extension"""
+    with open(filepath, 'rb') as f:
+        payload = f.read()
+    if filepath.endswith(COMPRESSION_EXTENSIONS["gzip"]):
+        payload = gzip.decompress(payload)
+    elif filepath.endswith(COMPRESSION_EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise ImportError("zstandard is required to read .json.zst question files")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    return json.loads(payload.decode('utf-8'))
+
 
 class QuestionStore:
-    def __init__(self, base_dir: str = "backend/data/generated_questions"):
-        """Initialize the question store with a base directory."""
+    def __init__(
+        self,
+        base_dir: str = "backend/data/generated_questions",
+        compression: Optional[str] = None,
+        load_cache_size: int = 256
+    ):
+        """Initialize the question store with a base directory.
+
+        Headers of saved sets are kept in a SQLite index so listing them does
+        not read every file. An empty index over a non-empty directory (e.g.
+        files saved before the index existed) is rebuilt from disk.
+
+        New sets are written as plain JSON, or compressed with "gzip" or
+        "zstd" (defaults to QUESTION_STORE_COMPRESSION). Files in every format
+        can be loaded regardless of the setting.
+
+        Up to `load_cache_size` loaded sets are kept in memory, keyed by file
+        name and version (mtime and size) so files changed on disk are read again.
+        """
+        compression = compression or os.getenv("QUESTION_STORE_COMPRESSION") or None
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"compression must be one of {list(COMPRESSION_EXTENSIONS)}")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+        self.compression = compression
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
+        self.index = QuestionSetIndex(os.path.join(self.base_dir, INDEX_FILENAME))
+        self.load_cache = LRUCache(max_entries=load_cache_size)
+        if not len(self.index) and self._has_saved_files():
+            self.rebuild_index()
+
+    def _has_saved_files(self) -> bool:
+        """Check whether the directory holds any question file"""
+        with os.scandir(self.base_dir) as entries:
+            return any(is_question_file(entry.name) for entry in entries)
+
+    @staticmethod
+    def _metadata_entry(filename: str, data: Dict) -> Dict:
+        """Extract the header fields listed for a saved question set"""
+        return {
+            "filename": filename,
+            "video_id": data.get("video_id", "unknown"),
+            "timestamp": data.get("timestamp", ""),
+            "practice_type": data.get("practice_type", "Unknown Practice"),
+            "topic": data.get("topic", "Unknown Topic")
+        }
     
+    # Storage hooks: one file per question set. Alternative backends override these.
+
+    def _new_filename(self, video_id: str, timestamp: str) -> str:
+        """Name a new question set"""
+        return f"{video_id}_{timestamp}{COMPRESSION_EXTENSIONS[self.compression]}"
+
+    def _write_question_set(self, filename: str, data: Dict):
+        """Persist a question set under its name"""
+        write_atomic(os.path.join(self.base_dir, filename), encode_question_set(data, self.compression))
+
+    def _remove_question_set(self, filename: str) -> bool:
+        """Remove a stored question set, returning whether it existed"""
+        filepath = os.path.join(self.base_dir, filename)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            return True
+        return False
+
+    def _question_set_version(self, filename: str) -> Tuple:
+        """Return a value that changes whenever the stored set changes (raises if missing)"""
+        stat = os.stat(os.path.join(self.base_dir, filename))
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_question_set(self, filename: str) -> Dict:
+        """Read a stored question set"""
+        return read_question_set(os.path.join(self.base_dir, filename))
+
     def save_questions(self, data: Dict, video_id: str) -> str:
         """Save generated questions with timestamp and video ID."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{video_id}_{timestamp}.json"
-        filepath = os.path.join(self.base_dir, filename)
+        filename = self._new_filename(video_id, timestamp)
         
         # Add metadata to the questions
         metadata = {
@@ -24,63 +139,148 @@ class QuestionStore:
             "questions": data.get("questions", data)  # Fallback to entire data if no questions key
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        self._write_question_set(filename, metadata)
+        self._invalidate_load_cache(filename)
+        self.index.upsert([self._metadata_entry(filename, metadata)])
         
         return filename
     
     def delete_questions(self, filename: str) -> bool:
         """Delete a question file."""
         try:
-            filepath = os.path.join(self.base_dir, filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                return True
-            return False
+            removed = self._remove_question_set(filename)
+            self._invalidate_load_cache(filename)
+            # Also drops stale index entries for files removed behind our back
+            self.index.delete(filename)
+            return removed
         except Exception as e:
             print(f"Error deleting questions: {str(e)}")
             return False
     
+    def _invalidate_load_cache(self, filename: str):
+        """Drop every cached version of a file"""
+        self.load_cache.invalidate_where(lambda key: key[0] == filename)
+
+    def load_cache_stats(self) -> Dict[str, float]:
+        """Return size and hit/miss counters of the load cache"""
+        return self.load_cache.stats()
+
     def load_questions(self, filename: str) -> Optional[Dict]:
         """Load questions from a specific file."""
-        filepath = os.path.join(self.base_dir, filename)
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                # Ensure the data has the expected structure
-                if isinstance(data, dict):
-                    return {
-                        "video_id": data.get("video_id", "unknown"),
-                        "timestamp": data.get("timestamp", ""),
-                        "practice_type": data.get("practice_type", "Unknown Practice"),
-                        "topic": data.get("topic", "Unknown Topic"),
-                        "questions": data.get("questions", {})
-                    }
-                return None
+            cache_key = (filename,) + tuple(self._question_set_version(filename))
+            cached = self.load_cache.get(cache_key)
+            if cached is not None:
+                # Callers may modify what they get, so the cached copy stays private
+                return copy.deepcopy(cached)
+
+            data = self._read_question_set(filename)
+            # Ensure the data has the expected structure
+            if isinstance(data, dict):
+                questions = {
+                    "video_id": data.get("video_id", "unknown"),
+                    "timestamp": data.get("timestamp", ""),
+                    "practice_type": data.get("practice_type", "Unknown Practice"),
+                    "topic": data.get("topic", "Unknown Topic"),
+                    "questions": data.get("questions", {})
+                }
+                # Older versions of a rewritten file can never be hit again
+                self._invalidate_load_cache(filename)
+                self.load_cache.put(cache_key, copy.deepcopy(questions))
+                return questions
+            return None
         except Exception as e:
             print(f"Error loading questions: {str(e)}")
             return None
     
     def list_saved_questions(self) -> List[Dict]:
-        """List all saved question files with metadata."""
-        saved_questions = []
-        
+        """List all saved question files with metadata, newest first."""
+        return self.index.list_all()
+
+    @staticmethod
+    def _timestamp_bound(value: Union[str, datetime, None]) -> Optional[str]:
+        """Convert a datetime into the timestamp format used in filenames"""
+        if isinstance(value, datetime):
+            return value.strftime("%Y%m%d_%H%M%S")
+        return value
+
+    def query_saved_questions(
+        self,
+        video_id: Optional[str] = None,
+        practice_type: Optional[str] = None,
+        topic: Optional[str] = None,
+        since: Union[str, datetime, None] = None,
+        until: Union[str, datetime, None] = None,
+        sort_by: str = "timestamp",
+        descending: bool = True,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Fetch one page of saved question sets matching the filters.
+
+        Returns the page and an opaque cursor for the next one, or None when
+        there are no more. Pass the cursor back with the same filters and sort.
+        """
+        filters = {
+            field: value
+            for field, value in (("video_id", video_id), ("practice_type", practice_type), ("topic", topic))
+            if value is not None
+        }
+        return self.index.query(
+            filters=filters,
+            since=self._timestamp_bound(since),
+            until=self._timestamp_bound(until),
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit,
+            cursor=cursor
+        )
+
+    def list_practice_types(self) -> List[str]:
+        """List the practice types of saved question sets."""
+        return self.index.distinct("practice_type")
+
+    def rebuild_index(self) -> int:
+        """Rebuild the metadata index by reading every question file on disk."""
+        entries = []
         for filename in os.listdir(self.base_dir):
-            if filename.endswith('.json'):
+            if is_question_file(filename):
                 filepath = os.path.join(self.base_dir, filename)
                 try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        saved_questions.append({
-                            "filename": filename,
-                            "video_id": data.get("video_id", "unknown"),
-                            "timestamp": data.get("timestamp", ""),
-                            "practice_type": data.get("practice_type", "Unknown Practice"),
-                            "topic": data.get("topic", "Unknown Topic")
-                        })
+                    entries.append(self._metadata_entry(filename, read_question_set(filepath)))
                 except Exception as e:
                     print(f"Error reading {filename}: {str(e)}")
-        
-        # Sort by timestamp descending (newest first)
-        saved_questions.sort(key=lambda x: x["timestamp"], reverse=True)
-        return saved_questions 
\ No newline at end of file
+        self.index.replace_all(entries)
+        return len(entries)
+
+
+def create_question_store(backend: Optional[str] = None) -> QuestionStore:
+    """Create the question store selected by `backend` or QUESTION_STORE_BACKEND
+
+    "files" (the default) keeps one file per set; "segments" appends sets to
+    sharded segment logs, which scales to hundreds of thousands of sets.
+    """
+    backend = backend or os.getenv("QUESTION_STORE_BACKEND", "files")
+    if backend == "files":
+        return QuestionStore()
+    if backend == "segments":
+        # Imported here because the segment store builds on this module
+        from backend.segment_store import SegmentLogQuestionStore
+        return SegmentLogQuestionStore()
+    raise ValueError(f"Unknown question store backend: {backend}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the saved question store")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: re-create the metadata index from disk")
+    parser.add_argument("--base-dir", default="backend/data/generated_questions")
+    args = parser.parse_args()
+
+    store = QuestionStore(args.base_dir)
+    if args.command == "rebuild":
+        count = store.rebuild_index()
+        print(f"Indexed {count} saved question sets in {store.index.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import threading
+import time
+
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: float):
+        """Initialize a thread-safe limiter that spaces requests evenly
+
+        Each call to `acquire` reserves the next free slot, so concurrent
+        callers never exceed `requests_per_minute` between them.
+        """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive")
+        self.interval = 60.0 / requests_per_minute
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller may send its next request"""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
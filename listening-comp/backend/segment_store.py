@@ -0,0 +1,371 @@
+import argparse
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.docstore import decode_question, encode_question
+from backend.question_store import QuestionStore
+from backend.sqlite_store import connect
+
+# Record header: magic, operation, key length, payload length, CRC32 of key + payload
+_HEADER = struct.Struct("<4sBIII")
+_MAGIC = b"QSL1"
+_OP_PUT = 1
+_OP_DELETE = 2
+
+SEGMENT_PATTERN = "segment-{:06d}.log"
+
+
+def _segment_id(name: str) -> Optional[int]:
+    """Parse the number out of a segment file name"""
+    if name.startswith("segment-") and name.endswith(".log"):
+        try:
+            return int(name[len("segment-"):-len(".log")])
+        except ValueError:
+            return None
+    return None
+
+
+def encode_record(op: int, key: str, payload: bytes = b"") -> bytes:
+    """Frame one log record"""
+    key_bytes = key.encode("utf-8")
+    crc = zlib.crc32(key_bytes + payload)
+    return _HEADER.pack(_MAGIC, op, len(key_bytes), len(payload), crc) + key_bytes + payload
+
+
+def iter_records(path: str) -> Iterator[Tuple[int, str, int, int, bytes]]:
+    """Yield (op, key, offset, length, payload) for each intact record of a segment
+
+    Stops at the first truncated or corrupt record, which can only be the
+    tail of an interrupted append.
+    """
+    with open(path, "rb") as f:
+        offset = 0
+        while True:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            magic, op, key_length, payload_length, crc = _HEADER.unpack(header)
+            body = f.read(key_length + payload_length)
+            if magic != _MAGIC or len(body) < key_length + payload_length or zlib.crc32(body) != crc:
+                return
+            length = _HEADER.size + len(body)
+            yield op, body[:key_length].decode("utf-8"), offset, length, body[key_length:]
+            offset += length
+
+
+class _Shard:
+    def __init__(self, directory: str):
+        """Hold the segment files of one shard and its append lock"""
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def segment_ids(self) -> List[int]:
+        """Return the shard's segment numbers in order"""
+        ids = (_segment_id(name) for name in os.listdir(self.directory))
+        return sorted(segment for segment in ids if segment is not None)
+
+    def path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(segment))
+
+
+class SegmentLogQuestionStore(QuestionStore):
+    def __init__(
+        self,
+        base_dir: str = "backend/data/question_log",
+        shards: int = 8,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        load_cache_size: int = 256
+    ):
+        """Initialize a question store that appends sets to rotating segment files
+
+        Question sets are hashed by name onto `shards` shard directories. Each
+        shard appends zlib-compressed records to its newest segment and starts
+        a new one past `segment_max_bytes`. Deletes append a tombstone. A SQLite
+        offset index maps every live set to (shard, segment, offset, length),
+        and headers go to the same metadata index as QuestionStore, so listing
+        and queries behave identically. `compact` reclaims space held by
+        deleted and overwritten sets.
+        """
+        if shards < 1:
+            raise ValueError("shards must be positive")
+        if segment_max_bytes < 1:
+            raise ValueError("segment_max_bytes must be positive")
+        self.num_shards = shards
+        self.segment_max_bytes = segment_max_bytes
+        self._shards = [_Shard(os.path.join(base_dir, f"shard-{i:02d}")) for i in range(shards)]
+
+        self._lock = threading.Lock()
+        self._conn = connect(os.path.join(base_dir, "offsets.sqlite3"))
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS locations (
+                filename TEXT PRIMARY KEY,
+                shard INTEGER NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_locations_segment ON locations(shard, segment);
+            CREATE TABLE IF NOT EXISTS segments (
+                shard INTEGER NOT NULL,
+                segment INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (shard, segment)
+            );
+        """)
+        self._conn.commit()
+        self._recover_tails()
+
+        super().__init__(base_dir, load_cache_size=load_cache_size)
+        # The offset index can be missing even when the metadata index is not
+        with self._lock:
+            (recorded,) = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()
+        if not recorded and self._has_saved_files():
+            self.rebuild_index()
+
+    def _recover_tails(self):
+        """Cut segment bytes that were appended but never recorded (an interrupted save)
+
+        A segment missing from a non-empty offset index was created by an
+        append that never completed, so it is removed. With an empty index
+        (lost or never built) nothing is cut and the logs are replayed instead.
+        """
+        with self._lock:
+            sizes = {(shard, segment): size for shard, segment, size in
+                     self._conn.execute("SELECT shard, segment, size FROM segments")}
+        if not sizes:
+            return
+        for shard_num, shard in enumerate(self._shards):
+            for segment in shard.segment_ids():
+                recorded = sizes.get((shard_num, segment))
+                path = shard.path(segment)
+                if recorded is None:
+                    os.remove(path)
+                elif os.path.getsize(path) > recorded:
+                    with open(path, "r+b") as f:
+                        f.truncate(recorded)
+
+    def _shard_for(self, filename: str) -> int:
+        """Pick the shard a question set name belongs to"""
+        return zlib.crc32(filename.encode("utf-8")) % self.num_shards
+
+    def _append(self, shard_num: int, record: bytes, min_segment: int = 1) -> Tuple[int, int]:
+        """Append a record to a shard's active segment and return (segment, offset)
+
+        Segments numbered below `min_segment` are never written to. The caller
+        must hold the shard lock.
+        """
+        shard = self._shards[shard_num]
+        segments = shard.segment_ids()
+        segment = max(segments[-1] if segments else 1, min_segment)
+        path = shard.path(segment)
+        offset = os.path.getsize(path) if os.path.exists(path) else 0
+        if offset and offset + len(record) > self.segment_max_bytes:
+            segment, offset = segment + 1, 0
+            path = shard.path(segment)
+        with open(path, "ab") as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        return segment, offset
+
+    def _record_append(self, shard_num: int, segment: int, end: int, location: Optional[Tuple[str, int]] = None):
+        """Record a segment's new size and, for puts, where the set now lives"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO segments (shard, segment, size) VALUES (?, ?, ?)",
+                (shard_num, segment, end)
+            )
+            if location is not None:
+                filename, offset = location
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO locations (filename, shard, segment, offset, length) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (filename, shard_num, segment, offset, end - offset)
+                )
+            self._conn.commit()
+
+    def _location(self, filename: str) -> Optional[Tuple[int, int, int, int]]:
+        """Return (shard, segment, offset, length) of a live set, or None"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT shard, segment, offset, length FROM locations WHERE filename = ?", (filename,)
+            ).fetchone()
+
+    # Storage hooks
+
+    def _has_saved_files(self) -> bool:
+        return any(shard.segment_ids() for shard in self._shards)
+
+    def _new_filename(self, video_id: str, timestamp: str) -> str:
+        filename = f"{video_id}_{timestamp}.json"
+        # Saves within the same second must not overwrite each other
+        suffix = 2
+        while self._location(filename) is not None:
+            filename = f"{video_id}_{timestamp}_{suffix}.json"
+            suffix += 1
+        return filename
+
+    def _write_question_set(self, filename: str, data: Dict):
+        shard_num = self._shard_for(filename)
+        record = encode_record(_OP_PUT, filename, encode_question(data))
+        with self._shards[shard_num].lock:
+            segment, offset = self._append(shard_num, record)
+            self._record_append(shard_num, segment, offset + len(record), (filename, offset))
+
+    def _remove_question_set(self, filename: str) -> bool:
+        if self._location(filename) is None:
+            return False
+        shard_num = self._shard_for(filename)
+        record = encode_record(_OP_DELETE, filename)
+        with self._shards[shard_num].lock:
+            segment, offset = self._append(shard_num, record)
+            self._record_append(shard_num, segment, offset + len(record))
+            with self._lock:
+                self._conn.execute("DELETE FROM locations WHERE filename = ?", (filename,))
+                self._conn.commit()
+        return True
+
+    def _question_set_version(self, filename: str) -> Tuple:
+        location = self._location(filename)
+        if location is None:
+            raise FileNotFoundError(f"No saved question set named {filename}")
+        # Records are immutable, so the location identifies the version
+        return location
+
+    def _read_question_set(self, filename: str) -> Dict:
+        location = self._location(filename)
+        if location is None:
+            raise FileNotFoundError(f"No saved question set named {filename}")
+        shard_num, segment, offset, length = location
+        with open(self._shards[shard_num].path(segment), "rb") as f:
+            f.seek(offset)
+            record = f.read(length)
+        if len(record) != length:
+            raise ValueError(f"Truncated record for {filename} in shard {shard_num} segment {segment}")
+        magic, op, key_length, payload_length, crc = _HEADER.unpack_from(record)
+        body = record[_HEADER.size:]
+        if magic != _MAGIC or op != _OP_PUT or zlib.crc32(body) != crc:
+            raise ValueError(f"Corrupt record for {filename} in shard {shard_num} segment {segment}")
+        return decode_question(body[key_length:])
+
+    def rebuild_index(self) -> int:
+        """Rebuild the offset and metadata indexes by replaying every segment."""
+        locations: Dict[str, Tuple[int, int, int, int]] = {}
+        headers: Dict[str, Dict] = {}
+        sizes = []
+        for shard_num, shard in enumerate(self._shards):
+            with shard.lock:
+                for segment in shard.segment_ids():
+                    end = 0
+                    for op, filename, offset, length, payload in iter_records(shard.path(segment)):
+                        end = offset + length
+                        if op == _OP_PUT:
+                            locations[filename] = (shard_num, segment, offset, length)
+                            headers[filename] = self._metadata_entry(filename, decode_question(payload))
+                        else:
+                            locations.pop(filename, None)
+                            headers.pop(filename, None)
+                    sizes.append((shard_num, segment, end))
+        with self._lock:
+            self._conn.execute("DELETE FROM locations")
+            self._conn.execute("DELETE FROM segments")
+            self._conn.executemany(
+                "INSERT INTO locations (filename, shard, segment, offset, length) VALUES (?, ?, ?, ?, ?)",
+                [(filename,) + location for filename, location in locations.items()]
+            )
+            self._conn.executemany("INSERT INTO segments (shard, segment, size) VALUES (?, ?, ?)", sizes)
+            self._conn.commit()
+        # Drop unrecorded tails such as a record cut short by a crash
+        self._recover_tails()
+        self.index.replace_all(headers.values())
+        self.load_cache.clear()
+        return len(headers)
+
+    def segment_stats(self) -> Dict[str, int]:
+        """Return total and live bytes across all segments"""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM segments").fetchone()[0]
+            live = self._conn.execute("SELECT COALESCE(SUM(length), 0) FROM locations").fetchone()[0]
+            segments = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        return {"segments": segments, "total_bytes": total, "live_bytes": live, "dead_bytes": total - live}
+
+    def compact(self, min_dead_ratio: float = 0.3) -> Dict[str, int]:
+        """Reclaim space held by deleted and overwritten question sets
+
+        Each shard whose segments are at least `min_dead_ratio` dead is
+        rewritten: its live sets are copied into fresh segments numbered after
+        the existing ones, then every old segment is deleted. The copies are
+        newer than anything they replace, and tombstones are only dropped
+        together with all the older records they could shadow, so replaying
+        the log after a crash at any point still yields the same sets.
+        """
+        totals = {"shards": 0, "segments_removed": 0, "records_moved": 0, "bytes_reclaimed": 0}
+        for shard_num, shard in enumerate(self._shards):
+            with shard.lock:
+                old_segments = shard.segment_ids()
+                if not old_segments:
+                    continue
+                with self._lock:
+                    total = self._conn.execute(
+                        "SELECT COALESCE(SUM(size), 0) FROM segments WHERE shard = ?", (shard_num,)
+                    ).fetchone()[0]
+                    live_rows = self._conn.execute(
+                        "SELECT filename, segment, offset, length FROM locations "
+                        "WHERE shard = ? ORDER BY segment, offset",
+                        (shard_num,)
+                    ).fetchall()
+                live = sum(row[3] for row in live_rows)
+                if not total or (total - live) / total < min_dead_ratio:
+                    continue
+
+                first_new = old_segments[-1] + 1
+                for filename, segment, offset, length in live_rows:
+                    with open(shard.path(segment), "rb") as f:
+                        f.seek(offset)
+                        record = f.read(length)
+                    new_segment, new_offset = self._append(shard_num, record, min_segment=first_new)
+                    self._record_append(shard_num, new_segment, new_offset + length, (filename, new_offset))
+                    totals["records_moved"] += 1
+
+                for segment in old_segments:
+                    os.remove(shard.path(segment))
+                with self._lock:
+                    self._conn.execute(
+                        "DELETE FROM segments WHERE shard = ? AND segment < ?", (shard_num, first_new)
+                    )
+                    self._conn.commit()
+                totals["shards"] += 1
+                totals["segments_removed"] += len(old_segments)
+                totals["bytes_reclaimed"] += total - live
+        if totals["records_moved"]:
+            # Cached versions are keyed by location, which has changed
+            self.load_cache.clear()
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the segment-log question store")
+    parser.add_argument("command", choices=["compact", "rebuild", "stats"],
+                        help="compact: reclaim space from deleted sets; rebuild: replay segments into the indexes")
+    parser.add_argument("--base-dir", default="backend/data/question_log")
+    parser.add_argument("--min-dead-ratio", type=float, default=0.3,
+                        help="Only compact shards whose segments are at least this fraction dead")
+    args = parser.parse_args()
+
+    store = SegmentLogQuestionStore(args.base_dir)
+    if args.command == "compact":
+        totals = store.compact(min_dead_ratio=args.min_dead_ratio)
+        print(f"Compacted {totals['shards']} shards: removed {totals['segments_removed']} segments, "
+              f"moved {totals['records_moved']} sets, reclaimed {totals['bytes_reclaimed']} bytes")
+    elif args.command == "rebuild":
+        count = store.rebuild_index()
+        print(f"Indexed {count} saved question sets from {args.base_dir}")
+    print(store.segment_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import threading
+from typing import Iterator, List
+
+# SQLite limits the number of bound parameters per statement
+SQLITE_BATCH = 500
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a SQLite database in WAL mode that threads can share, creating its directory
+
+    Callers must serialize every use of the connection with their own lock.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def batched(items: List, size: int = SQLITE_BATCH) -> Iterator[List]:
+    """Split a list into chunks small enough to bind in a single statement"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteStore:
+    def __init__(self, path: str, schema: str):
+        """Open the SQLite database at `path` and create `schema` in it
+
+        Base class of the SQLite-backed stores and indexes: subclasses hold
+        `self._lock` around every use of `self._conn`.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.executescript(schema)
+        self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,22 @@
 import openai
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 import os
 import json
 import datetime
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.transcript_segmenter import section_inputs, split_windows, transcript_to_text
+from backend.question_parser import (
+    NearDuplicateFilter,
+    iter_lines,
+    iter_questions,
+    merge_question_blocks,
+    question_content,
+)
+from backend.disk_cache import ResponseCache
+from backend.token_budget import compact_transcript, estimate_message_tokens, log_token_usage
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,10 +27,58 @@ openai.api_key = os.getenv('OPENAI_API_KEY')
 # OpenAI model
 MODEL_ID = "gpt-3.5-turbo"
 
+# Default location of the persistent LLM response cache
+RESPONSE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "llm_cache.sqlite3")
+
 class TranscriptStructurer:
-    def __init__(self, model_id: str = MODEL_ID):
-        """Initialize the transcript structurer with OpenAI."""
+    def __init__(
+        self,
+        model_id: str = MODEL_ID,
+        max_concurrency: int = 3,
+        request_timeout: Optional[float] = 60,
+        presegment: bool = True,
+        chunk_chars: Optional[int] = 6000,
+        chunk_overlap: int = 600,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        cache_path: Optional[str] = RESPONSE_CACHE_PATH,
+        cache_size: int = 10_000,
+        rate_limiter=None,
+        compact: bool = True
+    ):
+        """Initialize the transcript structurer with OpenAI.
+
+        In concurrent mode up to `max_concurrency` section requests run at once,
+        and each request is abandoned after `request_timeout` seconds. With
+        `presegment` each section prompt only receives its own 問題N slice.
+        Slices longer than `chunk_chars` are split into windows overlapping by
+        `chunk_overlap` characters, structured separately and merged; None
+        sends each slice in one request.
+
+        Responses are cached on disk under `cache_path` (None disables the
+        cache), keeping the `cache_size` most recently used ones. A
+        `rate_limiter` (anything with an `acquire()` method, e.g.
+        backend.rate_limiter.RateLimiter) is consulted before every API request.
+        With `compact` timestamps, filler lines and extra whitespace are stripped
+        from the transcript before it is prompted.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
         self.model_id = model_id
+        self.max_concurrency = max_concurrency
+        self.request_timeout = request_timeout
+        self.presegment = presegment
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.cache = ResponseCache(cache_path, max_entries=cache_size) if cache_path else None
+        self.rate_limiter = rate_limiter
+        self.compact = compact
+        # Running totals across calls, for throughput and cost reporting
+        self.usage = {"requests": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                      "estimated_prompt_tokens": 0}
+        self._usage_lock = threading.Lock()
         self.prompts = {
             1: """Extract questions from section 問題1 of this JLPT transcript where the answer can be determined solely from the conversation without needing visual aids.
             
@@ -136,9 +197,96 @@ class TranscriptStructurer:
             - Output questions one after another with no extra text between them"""
         }
 
-    def structure_transcript(self, transcript_text: str) -> Dict[int, str]:
-        """Structure the transcript into sections using separate prompts."""
+    def _record_usage(self, **counts: int):
+        """Add to the running usage totals"""
+        with self._usage_lock:
+            for name, count in counts.items():
+                self.usage[name] += count
+
+    def _cache_key(self, section_num: int, transcript_text: str) -> Optional[str]:
+        """Return the response cache key for a request, or None without a cache"""
+        if self.cache is None:
+            return None
+        return ResponseCache.make_key(self.model_id, self.temperature, self.max_tokens,
+                                      self.prompts[section_num], transcript_text, tag=f"section{section_num}")
+
+    def _request(self, section_num: int, transcript_text: str, stream: bool = False):
+        """Send the chat completion request for one section"""
+        messages = [
+            {"role": "system", "content": self.prompts[section_num]},
+            {"role": "user", "content": f"Please structure this transcript into practice questions:\n\n{transcript_text}"}
+        ]
+        estimated = estimate_message_tokens(messages)
+        self._record_usage(estimated_prompt_tokens=estimated)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = openai.ChatCompletion.create(
+            model=self.model_id,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            request_timeout=self.request_timeout,
+            stream=stream
+        )
+        # Streamed responses carry no usage to compare against
+        log_token_usage(f"structure section {section_num}", estimated, None if stream else response.get('usage'))
+        return response
+
+    def _structure_section(self, section_num: int, transcript_text: str, use_cache: bool = True) -> str:
+        """Extract the questions of one section with a single LLM request.
+
+        Cached responses are reused when `use_cache` is set; a fresh response
+        always replaces the cached one.
+        """
+        key = self._cache_key(section_num, transcript_text)
+        if key is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record_usage(cached=1)
+                return cached
+
+        response = self._request(section_num, transcript_text)
+        usage = response.get('usage') or {}
+        self._record_usage(requests=1, prompt_tokens=usage.get('prompt_tokens', 0),
+                           completion_tokens=usage.get('completion_tokens', 0))
+        
+        # Get the response text
+        content = response.choices[0].message['content'].strip()
+        if key is not None:
+            self.cache.put(key, content)
+        return content
+
+    def _section_inputs(self, transcript_text, sections) -> Dict[int, str]:
+        """Return the transcript text to send with each section prompt"""
+        transcript_text = transcript_to_text(transcript_text)
+        if self.compact:
+            transcript_text = compact_transcript(transcript_text)
+        if not self.presegment:
+            return {section_num: transcript_text for section_num in sections}
+        return section_inputs(transcript_text, sections)
+
+    def _windows(self, text: str) -> List[str]:
+        """Split a section's input into the windows sent to the LLM"""
+        if not self.chunk_chars:
+            return [text]
+        return split_windows(text, self.chunk_chars, self.chunk_overlap)
+
+    def structure_transcript(
+        self,
+        transcript_text,
+        concurrent: bool = True,
+        use_cache: bool = True
+    ) -> Dict[int, str]:
+        """Structure the transcript into sections using separate prompts.
+
+        Accepts raw text or the entry list returned by the transcript downloader.
+        With `concurrent` the section and window requests are issued in parallel,
+        at most `max_concurrency` at a time. Pass `use_cache=False` to ignore
+        cached responses and regenerate them.
+        """
         results = {}
+        sections = range(1, 4)
+        inputs = self._section_inputs(transcript_text, sections)
         
         try:
             if not os.getenv("OPENAI_API_KEY"):
@@ -146,21 +294,25 @@ class TranscriptStructurer:
 Please make sure you have created a .env file with your API key:
 OPENAI_API_KEY=your-api-key-here""")
 
-            # Process each section
-            for section_num in range(1, 4):
-                response = openai.ChatCompletion.create(
-                    model=self.model_id,
-                    messages=[
-                        {"role": "system", "content": self.prompts[section_num]},
-                        {"role": "user", "content": f"Please structure this transcript into practice questions:\n\n{transcript_text}"}
-                    ],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                
-                # Get the response text
-                response_text = response.choices[0].message['content'].strip()
-                results[section_num] = response_text
+            # Map: one request per window of each section's input
+            tasks = [
+                (section_num, window)
+                for section_num in sections
+                for window in self._windows(inputs[section_num])
+            ]
+            if concurrent:
+                with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tasks))) as executor:
+                    outputs = list(executor.map(lambda task: self._structure_section(*task, use_cache), tasks))
+            else:
+                outputs = [self._structure_section(*task, use_cache) for task in tasks]
+
+            # Reduce: merge the windows of each section
+            for section_num in sections:
+                section_outputs = [output for (num, _), output in zip(tasks, outputs) if num == section_num]
+                if len(section_outputs) == 1:
+                    results[section_num] = section_outputs[0]
+                else:
+                    results[section_num] = merge_question_blocks(section_outputs)
                 
         except Exception as e:
             print(f"Error structuring transcript: {str(e)}")
@@ -168,6 +320,85 @@ OPENAI_API_KEY=your-api-key-here""")
             
         return results
 
+    def _stream_section(self, section_num: int, transcript_text: str, use_cache: bool = True) -> Iterator[Dict]:
+        """Yield the questions of one section as their blocks close in the token stream"""
+        key = self._cache_key(section_num, transcript_text)
+        if key is not None and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._record_usage(cached=1)
+                yield from iter_questions(cached.split("\n"))
+                return
+
+        # Streamed responses do not report token usage, only the request is counted
+        self._record_usage(requests=1)
+        pieces = []
+
+        def tokens():
+            for chunk in self._request(section_num, transcript_text, stream=True):
+                content = chunk.choices[0].delta.get('content')
+                if content:
+                    pieces.append(content)
+                    yield content
+
+        yield from iter_questions(iter_lines(tokens()))
+        # Only a completed stream is worth caching
+        if key is not None:
+            self.cache.put(key, "".join(pieces).strip())
+
+    def stream_questions(self, transcript_text, use_cache: bool = True) -> Iterator[Tuple[int, Dict]]:
+        """Yield (section_num, question) pairs as soon as each question is complete.
+
+        Sections and windows are streamed concurrently, so questions from
+        different sections interleave. A question whose content near-duplicates
+        one already yielded from a neighbouring, overlapping window of the same
+        section is dropped (the first copy wins). A section that fails
+        is reported and skipped while the others keep streaming.
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            print("Error structuring transcript: OpenAI API key not found in environment variables.")
+            return
+
+        sections = range(1, 4)
+        inputs = self._section_inputs(transcript_text, sections)
+        tasks = [
+            (section_num, position, window)
+            for section_num in sections
+            for position, window in enumerate(self._windows(inputs[section_num]))
+        ]
+
+        results = queue.Queue()
+        finished = object()
+
+        def worker(section_num: int, position: int, window: str):
+            try:
+                for question in self._stream_section(section_num, window, use_cache):
+                    results.put((section_num, position, question))
+            except Exception as e:
+                print(f"Error structuring section {section_num}: {str(e)}")
+            finally:
+                results.put(finished)
+
+        # Questions yielded so far per (section, window); only neighbouring windows overlap
+        seen = {(section_num, position): NearDuplicateFilter() for section_num, position, _ in tasks}
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(tasks))) as executor:
+            for task in tasks:
+                executor.submit(worker, *task)
+            remaining = len(tasks)
+            while remaining:
+                item = results.get()
+                if item is finished:
+                    remaining -= 1
+                    continue
+                section_num, position, question = item
+                neighbours = [seen[key] for key in ((section_num, position - 1), (section_num, position + 1)) if key in seen]
+                text = question_content(question) if neighbours else ""
+                if text.strip():
+                    if any(neighbour.match(text) is not None for neighbour in neighbours):
+                        continue
+                    seen[(section_num, position)].add(text)
+                yield section_num, question
+
     def save_transcript(self, transcript_text: str, filename: str) -> bool:
         """Save raw transcript to a file"""
         try:
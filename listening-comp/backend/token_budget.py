@@ -0,0 +1,77 @@
+import math
+import re
+from typing import Dict, Iterable, List, Optional
+
+# Per-message overhead of the chat format (role markers and separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+# Kanji are often split into more than one token, kana mostly map to one
+_KANJI = re.compile(r'[一-鿿㐀-䶿]')
+_KANA = re.compile(r'[぀-ヿㇰ-ㇿｦ-ﾟ]')
+_WORD = re.compile(r'[A-Za-z0-9]+')
+_SYMBOL = re.compile(r'[^\sA-Za-z0-9぀-ヿㇰ-ㇿｦ-ﾟ一-鿿㐀-䶿]')
+KANJI_TOKENS = 1.3
+KANA_TOKENS = 1.0
+CHARS_PER_WORD_TOKEN = 4
+
+# Subtitle timestamps leading a line, such as "00:12", "[01:02:03]" or
+# "00:00:01,000 --> 00:00:04,000"; times inside the dialogue are left alone
+_TIME = r'\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?'
+TIMESTAMP_PATTERN = re.compile(
+    rf'^\s*(?:[\[(]{_TIME}[\])]|{_TIME}(?:\s*-->\s*{_TIME})?(?=\s|$))'
+)
+# Lines carrying no content: sound cues, fillers, music marks or bare cue numbers
+FILLER_LINE_PATTERN = re.compile(
+    r'^(?:[\[(（【]?(?:音楽|拍手|笑|笑い|効果音|チャイム|music|applause)[\])）】]?'
+    r'|[♪〜~ー…・、。\s]+|えー+|えっと|あの+|まあ|うーん|\d+)$',
+    re.IGNORECASE
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in mixed Japanese and English text
+
+    A local approximation of the OpenAI tokenizers: kanji and kana are counted
+    per character, alphanumeric runs per four characters and other symbols
+    one each. Whitespace is mostly merged into neighbouring tokens.
+    """
+    if not text:
+        return 0
+    estimate = len(_KANJI.findall(text)) * KANJI_TOKENS + len(_KANA.findall(text)) * KANA_TOKENS
+    estimate += sum(math.ceil(len(word) / CHARS_PER_WORD_TOKEN) for word in _WORD.findall(text))
+    estimate += len(_SYMBOL.findall(text))
+    return int(math.ceil(estimate))
+
+
+def estimate_message_tokens(messages: Iterable[Dict[str, str]]) -> int:
+    """Estimate the prompt tokens of a chat completion request"""
+    return sum(estimate_tokens(message['content']) + MESSAGE_OVERHEAD_TOKENS
+               for message in messages) + REPLY_PRIMING_TOKENS
+
+
+def compact_transcript(text: str) -> str:
+    """Shrink a transcript before prompting without losing spoken content
+
+    Strips subtitle timestamps, collapses whitespace inside lines and drops
+    empty lines, filler-only lines and immediate repeats of the previous line.
+    """
+    lines: List[str] = []
+    for line in text.split("\n"):
+        line = " ".join(TIMESTAMP_PATTERN.sub("", line).split())
+        if not line or FILLER_LINE_PATTERN.match(line):
+            continue
+        if lines and lines[-1] == line:
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def log_token_usage(label: str, estimated: int, usage: Optional[Dict] = None):
+    """Print the estimated prompt tokens of a call next to the reported usage"""
+    actual = (usage or {}).get('prompt_tokens')
+    if actual:
+        print(f"{label}: estimated {estimated} prompt tokens, actual {actual} "
+              f"({(estimated - actual) / actual * 100:+.0f}%), {usage.get('completion_tokens', 0)} completion tokens")
+    else:
+        print(f"{label}: estimated {estimated} prompt tokens")
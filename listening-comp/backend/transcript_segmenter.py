@@ -0,0 +1,109 @@
+import re
+from typing import Dict, Iterable, List, Tuple, Union
+
+# Section announcements such as "問題1", "問題 ２", "もんだい3" or "問題三" leading a
+# line; mentions inside a sentence ("問題1から問題3まであります") are not headers
+SECTION_PATTERN = re.compile(
+    r'^[ \t　]*(?:問題|もんだい)[ \t　]*([0-9０-９一二三四五六七八九])(?=[\s。、．.:：)）]|$)',
+    re.MULTILINE
+)
+# Slices shorter than this cannot hold a question, so the header was likely a false match
+MIN_SECTION_CHARS = 40
+# A practice example announced on its own line, e.g. "例" or "例：", before the first real item
+EXAMPLE_PATTERN = re.compile(r'^\s*(?:例|れい)\s*(?:[:：。、]|$)')
+# The first numbered item of a section, e.g. "1番", "１ばん", "一番"
+FIRST_ITEM_PATTERN = re.compile(r'^\s*(?:1|１|一|いち)\s*(?:番|ばん)')
+
+_NUMERALS = {**{str(i): i for i in range(10)},
+             **{chr(ord('０') + i): i for i in range(10)},
+             **{k: i + 1 for i, k in enumerate('一二三四五六七八九')}}
+
+
+def transcript_to_text(transcript: Union[str, Iterable[Dict]]) -> str:
+    """Accept either raw text or YouTube transcript entries and return text"""
+    if isinstance(transcript, str):
+        return transcript
+    return "\n".join(entry['text'] for entry in transcript)
+
+
+def find_section_boundaries(text: str) -> List[Tuple[int, int]]:
+    """Return (section_num, offset) pairs for the first announcement of each section
+
+    Sections are expected in ascending order, so a mention of an earlier
+    section after a later one has started is treated as ordinary text.
+    """
+    boundaries = []
+    for match in SECTION_PATTERN.finditer(text):
+        section_num = _NUMERALS[match.group(1)]
+        if not boundaries or section_num > boundaries[-1][0]:
+            boundaries.append((section_num, match.start()))
+    return boundaries
+
+
+def strip_examples(section_text: str) -> str:
+    """Drop the practice example (例) that precedes the first numbered item"""
+    lines = section_text.split("\n")
+    start = next((i for i, line in enumerate(lines) if EXAMPLE_PATTERN.match(line)), None)
+    if start is None:
+        return section_text
+    end = next((i for i in range(start + 1, len(lines)) if FIRST_ITEM_PATTERN.match(lines[i])), None)
+    if end is None:
+        # Without a clear end of the example it is safer to keep everything
+        return section_text
+    return "\n".join(lines[:start] + lines[end:])
+
+
+def segment_transcript(text: str) -> Dict[int, str]:
+    """Split a transcript into the slices announced by 問題N headers
+
+    Only sections whose header was found are returned; each slice runs up to
+    the next header and has its practice example removed.
+    """
+    boundaries = find_section_boundaries(text)
+    segments = {}
+    for i, (section_num, start) in enumerate(boundaries):
+        end = boundaries[i + 1][1] if i + 1 < len(boundaries) else len(text)
+        segments[section_num] = strip_examples(text[start:end]).strip()
+    return segments
+
+
+def section_inputs(text: str, sections: Iterable[int]) -> Dict[int, str]:
+    """Map each requested section to its slice, falling back to the full transcript
+
+    The full transcript is also used when a slice is implausibly short.
+    """
+    segments = segment_transcript(text)
+    inputs = {}
+    for section_num in sections:
+        segment = segments.get(section_num, "")
+        inputs[section_num] = segment if len(segment) >= MIN_SECTION_CHARS else text
+    return inputs
+
+
+def split_windows(text: str, max_chars: int, overlap_chars: int = 0) -> List[str]:
+    """Split text into line-aligned windows of at most `max_chars` characters
+
+    Consecutive windows share up to `overlap_chars` characters of trailing
+    lines so a question cut at a window edge appears whole in one of them.
+    A single line longer than `max_chars` becomes its own window.
+    """
+    if len(text) <= max_chars:
+        return [text]
+    lines = text.split("\n")
+    windows = []
+    start = 0
+    while start < len(lines):
+        end, size = start, 0
+        while end < len(lines) and (end == start or size + len(lines[end]) + 1 <= max_chars):
+            size += len(lines[end]) + 1
+            end += 1
+        windows.append("\n".join(lines[start:end]))
+        if end >= len(lines):
+            break
+        # Step back over the overlap, always advancing at least one line
+        back, covered = end, 0
+        while back > start + 1 and covered + len(lines[back - 1]) + 1 <= overlap_chars:
+            back -= 1
+            covered += len(lines[back]) + 1
+        start = back
+    return windows
@@ -1,42 +1,183 @@
 import chromadb
 from chromadb.utils import embedding_functions
+import copy
 import json
 import os
-from typing import Dict, List, Optional
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
 from dotenv import load_dotenv
 import openai
+from concurrent.futures import ThreadPoolExecutor
+from backend.disk_cache import EmbeddingCache, normalize_text
+from backend.lru_cache import LRUCache
+from backend.lexical_index import BM25Index, lexical_text
+from backend.docstore import QuestionDocStore
+from backend.quantized_index import QUANTIZATION_MODES, QuantizedVectorIndex
+from backend.dedup import NearDuplicateIndex
+from backend.question_parser import iter_questions_from_file
+from backend.local_embeddings import LocalNGramEmbeddingFunction
+from backend.index_manifest import IndexManifest, file_sha256, question_hash
 
 # Load environment variables
 load_dotenv()
 
+# OpenAI embedding model and its output size
+EMBEDDING_MODEL = "text-embedding-ada-002"
+EMBEDDING_DIMENSIONS = 1536
+
+# Embedding backends selectable via QuestionVectorStore(embedding_backend=...)
+# or the EMBEDDING_BACKEND environment variable
+EMBEDDING_BACKENDS = ["openai", "local"]
+
+# Search modes for QuestionVectorStore.search_similar_questions
+SEARCH_MODES = ["vector", "lexical", "hybrid"]
+
+# Stored in Chroma in place of real embeddings when a quantized index serves
+# vector search, so no second full-precision copy is kept
+PLACEHOLDER_EMBEDDING = [0.0]
+
+# Structured question files are named <video_id>_section<N>.txt
+QUESTION_FILE_PATTERN = re.compile(r'^(?P<video_id>.+)_section(?P<section>\d+)\.txt$')
+
+
+def video_id_from_filename(filename: str) -> str:
+    """Return the video ID of a <video_id>_section<N>.txt question file"""
+    match = QUESTION_FILE_PATTERN.match(os.path.basename(filename))
+    if not match:
+        raise ValueError(f"Not a question file name: {filename}")
+    return match.group('video_id')
+
 class OpenAIEmbeddingFunction(embedding_functions.EmbeddingFunction):
-    def __init__(self, api_key: str = None):
-        """Initialize OpenAI embedding function"""
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = EMBEDDING_MODEL,
+        batch_size: int = 100,
+        max_workers: int = 4,
+        cache: Optional[EmbeddingCache] = None
+    ):
+        """Initialize OpenAI embedding function
+
+        Texts are sent in batches of `batch_size` inputs per request, with up to
+        `max_workers` batches in flight at once. When a `cache` is given, texts
+        already embedded with the same model are served from it.
+        """
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OpenAI API key is required")
+        if batch_size < 1 or max_workers < 1:
+            raise ValueError("batch_size and max_workers must be positive")
         openai.api_key = self.api_key
+        self.model = model
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.cache = cache
 
-    def __call__(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for a list of texts using OpenAI"""
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch of texts in a single request"""
+        try:
+            response = openai.Embedding.create(
+                model=self.model,
+                input=batch
+            )
+            # The API does not guarantee ordering, so place results by index
+            embeddings = [None] * len(batch)
+            for item in response['data']:
+                embeddings[item['index']] = item['embedding']
+            return [e if e is not None else [0.0] * EMBEDDING_DIMENSIONS for e in embeddings]
+        except Exception as e:
+            print(f"Error generating embeddings for batch of {len(batch)}: {str(e)}")
+            # Return zero vectors as fallback
+            return [[0.0] * EMBEDDING_DIMENSIONS for _ in batch]
+
+    def _embed_uncached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts via the API, in order"""
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if len(batches) == 1:
+            return self._embed_batch(batches[0])
+
+        # executor.map yields results in submission order, so output order is kept
         embeddings = []
-        for text in texts:
-            try:
-                response = openai.Embedding.create(
-                    model="text-embedding-ada-002",
-                    input=text
-                )
-                embedding = response['data'][0]['embedding']
-                embeddings.append(embedding)
-            except Exception as e:
-                print(f"Error generating embedding: {str(e)}")
-                # Return a zero vector as fallback
-                embeddings.append([0.0] * 1536)  # OpenAI embeddings are 1536 dimensions
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            for batch_embeddings in executor.map(self._embed_batch, batches):
+                embeddings.extend(batch_embeddings)
         return embeddings
 
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for a list of texts using OpenAI"""
+        if not texts:
+            return []
+        if self.cache is None:
+            return self._embed_uncached(texts)
+
+        cached = self.cache.get_many(self.model, texts)
+        missing = [text for text in dict.fromkeys(texts) if text not in cached]
+        if missing:
+            fresh = dict(zip(missing, self._embed_uncached(missing)))
+            # Zero vectors are error fallbacks and must not be cached
+            self.cache.put_many(self.model, {
+                text: embedding for text, embedding in fresh.items() if any(embedding)
+            })
+            cached.update(fresh)
+        return [cached[text] for text in texts]
+
+def create_embedding_function(
+    backend: str,
+    cache: Optional[EmbeddingCache] = None
+) -> embedding_functions.EmbeddingFunction:
+    """Create the embedding function for a named backend"""
+    if backend == "openai":
+        return OpenAIEmbeddingFunction(cache=cache)
+    if backend == "local":
+        return LocalNGramEmbeddingFunction()
+    raise ValueError(f"Unknown embedding backend '{backend}'. Choose one of: {', '.join(EMBEDDING_BACKENDS)}")
+
 class QuestionVectorStore:
-    def __init__(self, persist_directory: str = "backend/data/vector_store"):
-        """Initialize the vector store for JLPT listening questions"""
+    def __init__(
+        self,
+        persist_directory: str = "backend/data/vector_store",
+        embedding_cache_size: int = 100_000,
+        embedding_backend: Optional[str] = None,
+        embedding_fn: Optional[embedding_functions.EmbeddingFunction] = None,
+        query_cache_size: int = 1024,
+        query_cache_ttl: Optional[float] = 600,
+        quantization: Optional[str] = None,
+        dedup: bool = False,
+        dedup_threshold: float = 0.8
+    ):
+        """Initialize the vector store for JLPT listening questions
+
+        `embedding_backend` picks the embedding function ("openai" or "local"),
+        defaulting to the EMBEDDING_BACKEND environment variable and then
+        "openai". A ready-made `embedding_fn` overrides the backend. Embeddings
+        are cached on disk under `persist_directory`, so re-indexing and
+        repeated queries do not hit the embedding API again.
+
+        Backends produce vectors of different sizes, so each non-OpenAI backend
+        gets its own collections (e.g. "section2_questions_local").
+
+        Search results are kept in an in-process LRU cache of
+        `query_cache_size` entries that expire after `query_cache_ttl` seconds
+        and are invalidated whenever the section's collection changes.
+
+        With `quantization` set to "float16" or "int8", vector search is served
+        by a local quantized index (full-precision rows stay on disk and are
+        only read to re-score the top candidates) instead of by Chroma. Chroma
+        then keeps only documents and metadata, in separate "_quantized"
+        collections, so switching modes requires re-indexing.
+
+        With `dedup` on (it is off by default), questions whose MinHash
+        similarity to a stored question in the same section is at least
+        `dedup_threshold` (e.g. the same video re-uploaded under another ID)
+        are not stored again; they are recorded as aliases of the stored
+        question and looking them up returns that question. When a stored
+        question is deleted, the files its aliases came from are re-indexed.
+        Aliases added with add_questions rather than from a file cannot be
+        restored and are dropped with it.
+        """
         self.persist_directory = persist_directory
         
         # Create directory if it doesn't exist
@@ -45,186 +186,711 @@ class QuestionVectorStore:
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        # Use OpenAI's embedding model
-        self.embedding_fn = OpenAIEmbeddingFunction()
+        # Embeddings are backed by a persistent embedding cache
+        self.embedding_cache = EmbeddingCache(
+            os.path.join(persist_directory, "embedding_cache.sqlite3"),
+            max_entries=embedding_cache_size
+        )
+        self.embedding_backend = embedding_backend or os.getenv("EMBEDDING_BACKEND", "openai")
+        self.embedding_fn = embedding_fn or create_embedding_function(
+            self.embedding_backend,
+            cache=self.embedding_cache
+        )
+        suffix = "" if self.embedding_backend == "openai" else f"_{self.embedding_backend}"
+        if quantization:
+            # Quantized collections hold placeholder vectors and cannot be shared
+            suffix += "_quantized"
         
         # Create or get collections for each section type
         self.collections = {
             "section2": self.client.get_or_create_collection(
-                name="section2_questions",
+                name=f"section2_questions{suffix}",
                 embedding_function=self.embedding_fn,
                 metadata={"description": "JLPT listening comprehension questions - Section 2"}
             ),
             "section3": self.client.get_or_create_collection(
-                name="section3_questions",
+                name=f"section3_questions{suffix}",
                 embedding_function=self.embedding_fn,
                 metadata={"description": "JLPT phrase matching questions - Section 3"}
             )
         }
 
-    def add_questions(self, section_num: int, questions: List[Dict], video_id: str):
-        """Add questions to the vector store"""
+        # Full question structures live in a side docstore; Chroma metadata only
+        # holds the small filterable fields
+        self.docstore = QuestionDocStore(os.path.join(persist_directory, f"docstore{suffix}.sqlite3"))
+
+        # BM25 indexes over character bigrams, kept in step with the collections
+        self.lexical_indexes = {
+            section_num: BM25Index(os.path.join(persist_directory, f"lexical_section{section_num}{suffix}.sqlite3"))
+            for section_num in [2, 3]
+        }
+
+        # Optional quantized vector indexes for the local search path
+        if quantization is not None and quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization '{quantization}'. Choose one of: {', '.join(QUANTIZATION_MODES)}")
+        self.quantization = quantization
+        self.quantized_indexes = {
+            section_num: QuantizedVectorIndex(
+                os.path.join(persist_directory, f"quantized_section{section_num}{suffix}"),
+                mode=quantization
+            )
+            for section_num in [2, 3]
+        } if quantization else {}
+
+        # MinHash LSH index used to merge near-duplicate questions at ingest
+        self.dedup_index = NearDuplicateIndex(
+            os.path.join(persist_directory, f"dedup{suffix}.sqlite3"),
+            threshold=dedup_threshold
+        ) if dedup else None
+
+        # Search results keyed by (section, normalized query, n_results, mode, alpha)
+        self.query_cache = LRUCache(max_entries=query_cache_size, ttl_seconds=query_cache_ttl)
+
+        # Tracks which files (and question versions) are already indexed
+        self.manifest = IndexManifest(os.path.join(persist_directory, f"index_manifest{suffix}.json"))
+        # Files holding aliases of deleted questions, keyed by manifest key, with their section
+        self.stale_files: Dict[str, int] = {}
+
+    def _invalidate_query_cache(self, section_num: int):
+        """Drop cached search results for a section after its collection changes"""
+        self.query_cache.invalidate_where(lambda key: key[0] == section_num)
+
+    @staticmethod
+    def _query_cache_key(
+        section_num: int,
+        query: str,
+        n_results: int,
+        mode: str = "vector",
+        alpha: Optional[float] = None
+    ) -> Tuple:
+        """Build the search result cache key for a query"""
+        return (section_num, normalize_text(query), n_results, mode, alpha)
+
+    def query_cache_stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and size of the search result cache"""
+        return self.query_cache.stats()
+
+    def _get_collection(self, section_num: int):
+        """Return the collection for a supported section"""
         if section_num not in [2, 3]:
             raise ValueError("Only sections 2 and 3 are currently supported")
-            
-        collection = self.collections[f"section{section_num}"]
+        return self.collections[f"section{section_num}"]
+
+    @staticmethod
+    def question_id(video_id: str, section_num: int, idx: int) -> str:
+        """Build the unique ID of a question"""
+        return f"{video_id}_{section_num}_{idx}"
+
+    def _upsert_questions(
+        self,
+        section_num: int,
+        indexed_questions: List[Tuple[int, Dict]],
+        video_id: str
+    ):
+        """Insert or replace (index, question) pairs for a video"""
+        self.upsert_questions(
+            section_num,
+            [(video_id, idx, question) for idx, question in indexed_questions]
+        )
+
+    def _merge_near_duplicates(
+        self,
+        section_num: int,
+        records: List[Tuple[str, int, Dict]]
+    ) -> List[Tuple[str, int, Dict]]:
+        """Drop records that near-duplicate a stored question, recording them as aliases"""
+        kept = []
+        merged = []
+        for video_id, idx, question in records:
+            question_id = self.question_id(video_id, section_num, idx)
+            signature = self.dedup_index.hasher.signature(lexical_text(question))
+            if signature is None:
+                kept.append((video_id, idx, question))
+                continue
+            duplicate = self.dedup_index.find_duplicate(section_num, signature, exclude_id=question_id)
+            if duplicate is None:
+                # Index right away so later records in the same batch are checked against it
+                self.dedup_index.add(section_num, question_id, signature)
+                kept.append((video_id, idx, question))
+            else:
+                merged.append((question_id, duplicate))
+
+        if merged:
+            # A question edited into a duplicate of another must not linger under its own ID
+            self.delete_questions(section_num, [question_id for question_id, _ in merged])
+            for question_id, (canonical_id, similarity) in merged:
+                self.dedup_index.add_alias(question_id, canonical_id, similarity)
+        return kept
+
+    def get_duplicate_aliases(self, question_id: str) -> List[str]:
+        """List the IDs of near-duplicate questions merged into a stored question"""
+        return self.dedup_index.aliases(question_id) if self.dedup_index else []
+
+    def upsert_questions(self, section_num: int, records: List[Tuple[str, int, Dict]]):
+        """Insert or replace (video ID, index, question) records, possibly of several videos, in one batch"""
+        collection = self._get_collection(section_num)
+        if self.dedup_index is not None:
+            records = self._merge_near_duplicates(section_num, records)
+        if not records:
+            return
         
         ids = []
         documents = []
         metadatas = []
         
-        for idx, question in enumerate(questions):
+        for video_id, idx, question in records:
             # Create a unique ID for each question
-            question_id = f"{video_id}_{section_num}_{idx}"
-            ids.append(question_id)
+            ids.append(self.question_id(video_id, section_num, idx))
             
-            # Store the full question structure as metadata
+            # Only small filterable fields go into metadata; the full question
+            # structure is kept in the docstore
             metadatas.append({
                 "video_id": video_id,
                 "section": section_num,
                 "question_index": idx,
-                "full_structure": json.dumps(question)
+                "content_hash": question_hash(question)
             })
             
             # Create a searchable document from the question content
             if section_num == 2:
                 document = f"""
-                Situation: {question['Introduction']}
-                Dialogue: {question['Conversation']}
-                Question: {question['Question']}
+                Situation: {question.get('Introduction', '')}
+                Dialogue: {question.get('Conversation', '')}
+                Question: {question.get('Question', '')}
                 """
             else:  # section 3
                 document = f"""
-                Situation: {question['Situation']}
-                Question: {question['Question']}
+                Situation: {question.get('Situation', '')}
+                Question: {question.get('Question', '')}
                 """
             documents.append(document)
         
-        # Add to collection
-        collection.add(
-            ids=ids,
-            documents=documents,
-            metadatas=metadatas
+        self.docstore.put_many(
+            section_num,
+            ((question_id, question) for question_id, (_, _, question) in zip(ids, records))
         )
+        # Upsert so re-adding the same questions replaces them instead of failing
+        if self.quantized_indexes:
+            # The quantized index keeps the only copy of the vectors
+            self.quantized_indexes[section_num].upsert(ids, self.embedding_fn(documents))
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=[PLACEHOLDER_EMBEDDING] * len(ids)
+            )
+        else:
+            collection.upsert(
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas
+            )
+        self.lexical_indexes[section_num].upsert(
+            (question_id, lexical_text(question))
+            for question_id, (_, _, question) in zip(ids, records)
+        )
+        self._invalidate_query_cache(section_num)
+
+    def add_questions(self, section_num: int, questions: List[Dict], video_id: str, start_index: int = 0):
+        """Add questions to the vector store, replacing any with the same IDs
+
+        `start_index` numbers the questions when they arrive in batches, e.g.
+        from TranscriptStructurer.stream_questions.
+        """
+        self._upsert_questions(section_num, list(enumerate(questions, start_index)), video_id)
+
+    def delete_questions(self, section_num: int, question_ids: List[str]):
+        """Remove questions from the vector store"""
+        collection = self._get_collection(section_num)
+        if question_ids:
+            collection.delete(ids=list(question_ids))
+            self.docstore.delete(question_ids)
+            self.lexical_indexes[section_num].delete(question_ids)
+            if self.quantized_indexes:
+                self.quantized_indexes[section_num].delete(question_ids)
+            if self.dedup_index is not None:
+                self._release_aliases(question_ids)
+            self._invalidate_query_cache(section_num)
+
+    def _release_aliases(self, question_ids: List[str]):
+        """Forget deleted questions in the dedup index, scheduling their aliases' files for re-indexing"""
+        deleted = set(question_ids)
+        orphaned = [
+            alias
+            for question_id in question_ids
+            for alias in self.dedup_index.aliases(question_id)
+            if alias not in deleted
+        ]
+        self.dedup_index.remove(question_ids)
+        if not orphaned:
+            return
+        affected = self.manifest.forget_questions(orphaned)
+        if affected:
+            self.manifest.save()
+            self.stale_files.update(affected)
+            print(f"{len(orphaned)} near-duplicates of deleted questions will be re-indexed from "
+                  f"{len(affected)} files")
+        else:
+            print(f"{len(orphaned)} near-duplicates of deleted questions were not indexed from a file "
+                  f"and cannot be restored")
+
+    def reindex_stale_files(self) -> Dict[str, int]:
+        """Re-index the files whose aliases lost their stored question
+
+        Returns the combined counts of the re-indexed files.
+        """
+        totals = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        while self.stale_files:
+            filename, section_num = self.stale_files.popitem()
+            if not os.path.exists(filename):
+                continue
+            # Forced, since a concurrent manifest update may have marked the file unchanged again
+            summary = self.index_questions_file(filename, section_num, force=True)
+            for key, count in summary.items():
+                totals[key] += count
+        return totals
 
     def search_similar_questions(
         self, 
         section_num: int, 
         query: str, 
-        n_results: int = 5
+        n_results: int = 5,
+        mode: str = "vector",
+        alpha: float = 0.5
     ) -> List[Dict]:
-        """Search for similar questions in the vector store"""
-        if section_num not in [2, 3]:
-            raise ValueError("Only sections 2 and 3 are currently supported")
-            
-        collection = self.collections[f"section{section_num}"]
-        
-        results = collection.query(
-            query_texts=[query],
-            n_results=n_results
+        """Search for similar questions in the vector store
+
+        `mode` is "vector" (embedding similarity, the default), "lexical"
+        (BM25 over character bigrams, no embedding call) or "hybrid", which
+        fuses min-max normalized vector and BM25 scores as
+        alpha * vector + (1 - alpha) * lexical.
+        """
+        collection = self._get_collection(section_num)
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'. Choose one of: {', '.join(SEARCH_MODES)}")
+
+        cache_key = self._query_cache_key(section_num, query, n_results, mode, alpha if mode == "hybrid" else None)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        if mode == "lexical":
+            questions = self._lexical_search(section_num, query, n_results)
+        elif mode == "hybrid":
+            questions = self._hybrid_search(section_num, query, n_results, alpha)
+        else:
+            results = self._vector_query(section_num, n_results, query_texts=[query])
+            questions = self._format_query_results(section_num, results, 0)
+
+        self.query_cache.put(cache_key, copy.deepcopy(questions))
+        return questions
+
+    def _vector_query(
+        self,
+        section_num: int,
+        n_results: int,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> Dict[str, List[List]]:
+        """Run nearest-neighbour queries, returning Chroma-style ids and distances
+
+        Uses the quantized index when one is configured, otherwise Chroma.
+        """
+        if not self.quantized_indexes:
+            kwargs = {"query_texts": query_texts} if query_embeddings is None else {"query_embeddings": query_embeddings}
+            return self._get_collection(section_num).query(n_results=n_results, include=['distances'], **kwargs)
+
+        index = self._get_quantized_index(section_num)
+        if query_embeddings is None:
+            query_embeddings = self.embedding_fn(query_texts)
+        results = {"ids": [], "distances": []}
+        for embedding in query_embeddings:
+            hits = index.search(embedding, n_results)
+            results["ids"].append([question_id for question_id, _ in hits])
+            results["distances"].append([distance for _, distance in hits])
+        return results
+
+    def _get_quantized_index(self, section_num: int) -> QuantizedVectorIndex:
+        """Return a section's quantized index, building it if the collection predates it"""
+        index = self.quantized_indexes[section_num]
+        if not len(index) and self._get_collection(section_num).count():
+            self.rebuild_quantized_index(section_num)
+        return index
+
+    def rebuild_quantized_index(self, section_num: int, page_size: int = 1000):
+        """Rebuild a section's quantized index by re-embedding the documents stored in Chroma"""
+        collection = self._get_collection(section_num)
+        index = self.quantized_indexes[section_num]
+        index.clear()
+        offset = 0
+        while True:
+            page = collection.get(include=['documents'], limit=page_size, offset=offset)
+            if not len(page['ids']):
+                break
+            index.upsert(page['ids'], self.embedding_fn(page['documents']))
+            offset += len(page['ids'])
+
+    def _get_lexical_index(self, section_num: int) -> BM25Index:
+        """Return a section's BM25 index, building it if the collection predates it"""
+        index = self.lexical_indexes[section_num]
+        if not len(index) and self._get_collection(section_num).count():
+            self.rebuild_lexical_index(section_num)
+        return index
+
+    def iter_questions(self, section_num: int) -> Iterator[Tuple[str, Dict]]:
+        """Yield every stored (question_id, question) pair in a section"""
+        if self.docstore.count(section_num):
+            yield from self.docstore.iter_section(section_num)
+            return
+        # Collections indexed before the docstore keep questions in metadata
+        result = self._get_collection(section_num).get(include=['metadatas'])
+        for question_id, metadata in zip(result['ids'], result['metadatas']):
+            if metadata and 'full_structure' in metadata:
+                yield question_id, json.loads(metadata['full_structure'])
+
+    def rebuild_lexical_index(self, section_num: int):
+        """Rebuild a section's BM25 index from the stored questions"""
+        index = self.lexical_indexes[section_num]
+        index.clear()
+        index.upsert(
+            (question_id, lexical_text(question))
+            for question_id, question in self.iter_questions(section_num)
         )
-        
-        # Convert results to more usable format
+
+    def _get_questions(self, section_num: int, question_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch questions by ID from a section, keyed by ID"""
+        if not question_ids:
+            return {}
+        questions = self.docstore.get_many(question_ids)
+        missing = [question_id for question_id in question_ids if question_id not in questions]
+        if missing:
+            # Collections indexed before the docstore keep questions in metadata
+            result = self._get_collection(section_num).get(ids=missing, include=['metadatas'])
+            for question_id, metadata in zip(result['ids'], result['metadatas']):
+                if metadata and 'full_structure' in metadata:
+                    questions[question_id] = json.loads(metadata['full_structure'])
+        return questions
+
+    def get_questions_by_ids(self, section_num: int, question_ids: List[str]) -> List[Optional[Dict]]:
+        """Retrieve many questions by ID in one lookup, in the order given
+
+        IDs merged as near-duplicates resolve to the stored question they
+        duplicate. Unknown IDs yield None.
+        """
+        self._get_collection(section_num)
+        questions = self._get_questions(section_num, list(question_ids))
+        if self.dedup_index is not None:
+            canonical = {}
+            for question_id in question_ids:
+                if question_id not in questions:
+                    canonical_id = self.dedup_index.canonical_id(question_id)
+                    if canonical_id is not None:
+                        canonical[question_id] = canonical_id
+            if canonical:
+                resolved = self._get_questions(section_num, list(set(canonical.values())))
+                questions.update(
+                    (question_id, copy.deepcopy(resolved[canonical_id]))
+                    for question_id, canonical_id in canonical.items()
+                    if canonical_id in resolved
+                )
+        return [questions.get(question_id) for question_id in question_ids]
+
+    def _lexical_search(self, section_num: int, query: str, n_results: int) -> List[Dict]:
+        """Rank questions by BM25 score alone"""
+        hits = self._get_lexical_index(section_num).search(query, n_results)
+        questions_by_id = self._get_questions(section_num, [question_id for question_id, _ in hits])
+        questions = []
+        for question_id, score in hits:
+            if question_id in questions_by_id:
+                question_data = questions_by_id[question_id]
+                question_data['lexical_score'] = score
+                questions.append(question_data)
+        return questions
+
+    def _hybrid_search(self, section_num: int, query: str, n_results: int, alpha: float) -> List[Dict]:
+        """Rank questions by a weighted fusion of vector and BM25 scores"""
+        # Over-fetch from both retrievers so fusion can reorder their candidates
+        candidates = n_results * 3
+        vector_results = self._vector_query(section_num, candidates, query_texts=[query])
+        lexical_hits = self._get_lexical_index(section_num).search(query, candidates)
+
+        distances = dict(zip(vector_results['ids'][0], vector_results['distances'][0]))
+        lexical_scores = dict(lexical_hits)
+
+        def normalized(scores: Dict[str, float], invert: bool = False) -> Dict[str, float]:
+            if not scores:
+                return {}
+            low, high = min(scores.values()), max(scores.values())
+            if high == low:
+                return {key: 1.0 for key in scores}
+            if invert:
+                return {key: (high - value) / (high - low) for key, value in scores.items()}
+            return {key: (value - low) / (high - low) for key, value in scores.items()}
+
+        vector_norm = normalized(distances, invert=True)
+        lexical_norm = normalized(lexical_scores)
+        fused = {
+            question_id: alpha * vector_norm.get(question_id, 0.0) + (1 - alpha) * lexical_norm.get(question_id, 0.0)
+            for question_id in set(vector_norm) | set(lexical_norm)
+        }
+        top = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:n_results]
+
+        questions_by_id = self._get_questions(section_num, [question_id for question_id, _ in top])
+
         questions = []
-        for idx, metadata in enumerate(results['metadatas'][0]):
-            question_data = json.loads(metadata['full_structure'])
-            question_data['similarity_score'] = results['distances'][0][idx]
+        for question_id, score in top:
+            if question_id not in questions_by_id:
+                continue
+            question_data = questions_by_id[question_id]
+            question_data['hybrid_score'] = score
+            if question_id in distances:
+                question_data['similarity_score'] = distances[question_id]
+            if question_id in lexical_scores:
+                question_data['lexical_score'] = lexical_scores[question_id]
             questions.append(question_data)
-            
         return questions
 
+    def _format_query_results(self, section_num: int, results: Dict, row: int) -> List[Dict]:
+        """Convert one query's rows of a Chroma result to question dicts"""
+        question_ids = results['ids'][row]
+        questions_by_id = self._get_questions(section_num, question_ids)
+        questions = []
+        for question_id, distance in zip(question_ids, results['distances'][row]):
+            if question_id in questions_by_id:
+                question_data = questions_by_id[question_id]
+                question_data['similarity_score'] = distance
+                questions.append(question_data)
+        return questions
+
+    def search_similar_questions_batch(
+        self,
+        queries: List[Tuple[int, str]],
+        n_results: int = 5
+    ) -> List[List[Dict]]:
+        """Search for similar questions for many (section_num, query) pairs at once
+
+        All distinct query texts are embedded in a single pass and each section
+        collection is queried once with all of its query vectors. Queries found
+        in the search result cache are answered without embedding. Returns one
+        ranked result list per query, in the order given.
+        """
+        results: List[List[Dict]] = [[] for _ in queries]
+        by_section: Dict[int, List[int]] = {}
+        for position, (section_num, query) in enumerate(queries):
+            self._get_collection(section_num)
+            cached = self.query_cache.get(self._query_cache_key(section_num, query, n_results))
+            if cached is not None:
+                results[position] = copy.deepcopy(cached)
+            else:
+                by_section.setdefault(section_num, []).append(position)
+
+        unique_texts = list(dict.fromkeys(
+            queries[position][1] for positions in by_section.values() for position in positions
+        ))
+        if not unique_texts:
+            return results
+        embeddings = dict(zip(unique_texts, self.embedding_fn(unique_texts)))
+
+        for section_num, positions in by_section.items():
+            section_results = self._vector_query(
+                section_num,
+                n_results,
+                query_embeddings=[embeddings[queries[position][1]] for position in positions]
+            )
+            for row, position in enumerate(positions):
+                results[position] = self._format_query_results(section_num, section_results, row)
+                self.query_cache.put(
+                    self._query_cache_key(section_num, queries[position][1], n_results),
+                    copy.deepcopy(results[position])
+                )
+        return results
+
     def get_question_by_id(self, section_num: int, question_id: str) -> Optional[Dict]:
         """Retrieve a specific question by its ID"""
-        if section_num not in [2, 3]:
-            raise ValueError("Only sections 2 and 3 are currently supported")
-            
-        collection = self.collections[f"section{section_num}"]
-        
-        result = collection.get(
-            ids=[question_id],
+        return self.get_questions_by_ids(section_num, [question_id])[0]
+
+    @staticmethod
+    def parse_questions_from_file(filename: str) -> List[Dict]:
+        """Parse questions from a structured text file
+
+        Errors (e.g. a file that is not valid UTF-8) propagate: treating an
+        unreadable file as empty would delete its indexed questions.
+        """
+        return list(iter_questions_from_file(filename))
+
+    def _indexed_question_hashes(self, section_num: int, video_id: str) -> Dict[str, str]:
+        """Look up the IDs and content hashes already stored for a video"""
+        result = self._get_collection(section_num).get(
+            where={"video_id": video_id},
             include=['metadatas']
         )
-        
-        if result['metadatas']:
-            return json.loads(result['metadatas'][0]['full_structure'])
+        return {
+            question_id: (metadata or {}).get("content_hash", "")
+            for question_id, metadata in zip(result['ids'], result['metadatas'])
+        }
+
+    def plan_file_update(
+        self,
+        filename: str,
+        section_num: int,
+        video_id: str,
+        questions: List[Dict],
+        force: bool = False
+    ) -> Tuple[List[Tuple[int, Dict]], List[str], Dict[str, str], Dict[str, int]]:
+        """Diff freshly parsed questions against what is indexed for a file
+
+        Returns the (index, question) pairs to upsert, the question IDs to
+        delete, the new question hashes for the manifest and a summary of
+        added, updated, deleted and unchanged counts.
+        """
+        summary = {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        entry = self.manifest.get(filename)
+        if entry and entry['section'] == section_num and entry['video_id'] == video_id:
+            previous = entry['questions']
+        else:
+            # No usable manifest entry (first run or the file moved sections)
+            if entry:
+                self.delete_questions(entry['section'], list(entry['questions']))
+            previous = self._indexed_question_hashes(section_num, video_id)
+
+        current = {}
+        changed = []
+        for idx, question in enumerate(questions):
+            question_id = self.question_id(video_id, section_num, idx)
+            content_hash = question_hash(question)
+            current[question_id] = content_hash
+            if question_id not in previous:
+                summary["added"] += 1
+                changed.append((idx, question))
+            elif force or previous[question_id] != content_hash:
+                summary["updated"] += 1
+                changed.append((idx, question))
+            else:
+                summary["unchanged"] += 1
+
+        removed = [question_id for question_id in previous if question_id not in current]
+        summary["deleted"] = len(removed)
+        return changed, removed, current, summary
+
+    def check_file_unchanged(self, filename: str, section_num: int, force: bool = False) -> Optional[int]:
+        """Check a file against the manifest without parsing it
+
+        Returns the number of indexed questions if the file is unchanged, or
+        None if it needs re-indexing. A file whose mtime changed but whose
+        content hash did not has its manifest entry refreshed.
+        """
+        if force:
+            return None
+        stat = os.stat(filename)
+        entry = self.manifest.get(filename)
+        if self.manifest.is_unchanged(filename, stat):
+            return len(entry['questions'])
+        if entry and entry['section'] == section_num and entry['sha256'] == file_sha256(filename):
+            # Touched but not modified: refresh mtime so the next run takes the fast path
+            self.manifest.update(filename, stat, entry['sha256'], section_num, entry['video_id'], entry['questions'])
+            self.manifest.save()
+            return len(entry['questions'])
         return None
 
-    def parse_questions_from_file(self, filename: str) -> List[Dict]:
-        """Parse questions from a structured text file"""
-        questions = []
-        current_question = {}
-        
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                
-                if line.startswith('<question>'):
-                    current_question = {}
-                elif line.startswith('Introduction:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Introduction'] = lines[i].strip()
-                elif line.startswith('Conversation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Conversation'] = lines[i].strip()
-                elif line.startswith('Situation:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Situation'] = lines[i].strip()
-                elif line.startswith('Question:'):
-                    i += 1
-                    if i < len(lines):
-                        current_question['Question'] = lines[i].strip()
-                elif line.startswith('Options:'):
-                    options = []
-                    for _ in range(4):
-                        i += 1
-                        if i < len(lines):
-                            option = lines[i].strip()
-                            if option.startswith('1.') or option.startswith('2.') or option.startswith('3.') or option.startswith('4.'):
-                                options.append(option[2:].strip())
-                    current_question['Options'] = options
-                elif line.startswith('</question>'):
-                    if current_question:
-                        questions.append(current_question)
-                        current_question = {}
-                i += 1
-            return questions
-        except Exception as e:
-            print(f"Error parsing questions from {filename}: {str(e)}")
-            return []
+    def index_questions_file(self, filename: str, section_num: int, force: bool = False) -> Dict[str, int]:
+        """Incrementally index the questions from a file into the vector store
+
+        Files whose mtime and size (or, failing that, content hash) match the
+        manifest are skipped. Otherwise only new or changed questions are
+        upserted and questions no longer in the file are deleted. Returns
+        counts of added, updated, deleted and unchanged questions. A file
+        that cannot be parsed raises and leaves its indexed questions untouched.
+        """
+        unchanged = self.check_file_unchanged(filename, section_num, force=force)
+        if unchanged is not None:
+            return {"added": 0, "updated": 0, "deleted": 0, "unchanged": unchanged}
+
+        stat = os.stat(filename)
+        sha256 = file_sha256(filename)
 
-    def index_questions_file(self, filename: str, section_num: int):
-        """Index all questions from a file into the vector store"""
         # Extract video ID from filename
-        video_id = os.path.basename(filename).split('_section')[0]
+        video_id = video_id_from_filename(filename)
         
         # Parse questions from file
         questions = self.parse_questions_from_file(filename)
+
+        changed, removed, current, summary = self.plan_file_update(
+            filename, section_num, video_id, questions, force=force
+        )
+        self._upsert_questions(section_num, changed, video_id)
+        self.delete_questions(section_num, removed)
+
+        self.manifest.update(filename, stat, sha256, section_num, video_id, current)
+        self.manifest.save()
         
-        # Add to vector store
-        if questions:
-            self.add_questions(section_num, questions, video_id)
-            print(f"Indexed {len(questions)} questions from {filename}")
+        if changed or removed:
+            print(f"Indexed {filename}: {summary['added']} added, {summary['updated']} updated, "
+                  f"{summary['deleted']} deleted, {summary['unchanged']} unchanged")
+        return summary
+
+    def remove_missing_files(self, directory: str, existing: List[str]) -> int:
+        """Delete questions of manifest files under a directory that no longer exist
+
+        Returns the number of questions deleted.
+        """
+        seen = {self.manifest.key(filename) for filename in existing}
+        removed_files = [key for key in self.manifest.files_under(directory) if key not in seen]
+        deleted = 0
+        for key in removed_files:
+            entry = self.manifest.remove(key)
+            self.delete_questions(entry['section'], list(entry['questions']))
+            deleted += len(entry['questions'])
+            print(f"Removed {len(entry['questions'])} questions from deleted file {key}")
+        if removed_files:
+            self.manifest.save()
+        return deleted
+
+    def index_questions_directory(self, directory: str, force: bool = False) -> Dict[str, int]:
+        """Incrementally index every *_sectionN.txt file in a directory tree
+
+        Questions from files that were indexed before but no longer exist are
+        deleted, and files holding near-duplicates of deleted questions are
+        re-indexed. Files that fail to parse are reported and skipped, keeping
+        whatever was indexed from them before. Returns the combined counts over
+        all files.
+        """
+        totals = {"files": 0, "failed": 0, "added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        question_files = find_question_files(directory)
+        for filename, section_num in question_files:
+            totals["files"] += 1
+            try:
+                summary = self.index_questions_file(filename, section_num, force=force)
+            except Exception as e:
+                print(f"Error indexing {filename}, skipping it: {str(e)}")
+                totals["failed"] += 1
+                continue
+            for key, count in summary.items():
+                totals[key] += count
+
+        totals["deleted"] += self.remove_missing_files(directory, [filename for filename, _ in question_files])
+        for key, count in self.reindex_stale_files().items():
+            totals[key] += count
+        return totals
+
+
+def find_question_files(directory: str) -> List[Tuple[str, int]]:
+    """Find (filename, section) pairs for supported *_sectionN.txt files under a directory"""
+    found = []
+    for root, _, filenames in os.walk(directory):
+        for name in sorted(filenames):
+            match = QUESTION_FILE_PATTERN.match(name)
+            if match and int(match.group('section')) in [2, 3]:
+                found.append((os.path.join(root, name), int(match.group('section'))))
+    return found
 
 if __name__ == "__main__":
     # Example usage
     store = QuestionVectorStore()
     
-    # Index questions from files
-    question_files = [
-        ("backend/data/questions/sY7L5cfCWno_section2.txt", 2),
-        ("backend/data/questions/sY7L5cfCWno_section3.txt", 3)
-    ]
-    
-    for filename, section_num in question_files:
-        if os.path.exists(filename):
-            store.index_questions_file(filename, section_num)
+    # Incrementally index every question file; unchanged files are skipped
+    totals = store.index_questions_directory("backend/data/questions")
+    print(f"Indexed {totals['files']} files: {totals['added']} added, {totals['updated']} updated, "
+          f"{totals['deleted']} deleted, {totals['unchanged']} unchanged")
     
     # Search for similar questions
     similar = store.search_similar_questions(2, "誕生日について質問", n_results=1) 
\ No newline at end of file
@@ -0,0 +1,278 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from chromadb.utils import embedding_functions
+
+from backend.quantized_index import QUANTIZATION_MODES, recall_at_k
+from backend.vector_store import QuestionVectorStore
+
+# Vocabulary for synthetic JLPT-style questions
+PLACES = ["駅", "図書館", "郵便局", "銀行", "病院", "公園", "デパート", "レストラン", "学校", "会社", "空港", "本屋"]
+ITEMS = ["傘", "かばん", "切符", "ケーキ", "本", "時計", "カメラ", "辞書", "シャツ", "花", "お弁当", "コーヒー"]
+TOPICS = ["誕生日", "旅行", "買い物", "天気", "週末の予定", "引っ越し", "アルバイト", "映画", "料理", "宿題"]
+TIMES = ["月曜日", "火曜日", "水曜日", "木曜日", "金曜日", "土曜日", "日曜日", "朝", "昼", "夜"]
+SPEAKERS = [("男", "女"), ("先生", "学生"), ("店員", "客"), ("母", "子ども")]
+
+
+class DeterministicEmbeddingFunction(embedding_functions.EmbeddingFunction):
+    def __init__(self, dimensions: int = 1536):
+        """Initialize a fake embedding function that maps each text to a fixed random unit vector"""
+        self.dimensions = dimensions
+        self.model = f"fake-{dimensions}"
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            embeddings.append(vector.tolist())
+        return embeddings
+
+
+def synthetic_question(rng: random.Random, section_num: int) -> Dict:
+    """Generate one JLPT-style question for a section"""
+    place, item, topic, day = rng.choice(PLACES), rng.choice(ITEMS), rng.choice(TOPICS), rng.choice(TIMES)
+    a, b = rng.choice(SPEAKERS)
+    options = rng.sample(ITEMS if rng.random() < 0.5 else PLACES, 4)
+    if section_num == 2:
+        return {
+            "Introduction": f"{a}の人と{b}の人が{topic}について話しています。",
+            "Conversation": (
+                f"{a}: {day}に{place}へ行きませんか。\n"
+                f"{b}: いいですね。{item}を買いたいです。\n"
+                f"{a}: じゃあ、{rng.randint(1, 12)}時に{place}の前で会いましょう。"
+            ),
+            "Question": f"{b}の人は{place}で何をしますか。",
+            "Options": options
+        }
+    # The time keeps section 3 questions from repeating, which would make recall ties
+    return {
+        "Situation": (
+            f"{day}の{rng.randint(1, 12)}時{rng.randint(0, 59)}分に{place}で"
+            f"{item}を{rng.choice(['借りたい', '買いたい', '返したい', '探している'])}です。"
+        ),
+        "Question": "何と言いますか。",
+        "Options": [f"{option}をください。" for option in options]
+    }
+
+
+def synthetic_corpus(size: int, seed: int, questions_per_video: int = 6):
+    """Yield (section_num, video_id, questions) batches totalling `size` questions"""
+    rng = random.Random(seed)
+    produced = 0
+    video = 0
+    while produced < size:
+        section_num = 2 if video % 2 == 0 else 3
+        count = min(questions_per_video, size - produced)
+        yield section_num, f"synthetic{video:07d}", [synthetic_question(rng, section_num) for _ in range(count)]
+        produced += count
+        video += 1
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds"""
+    values = np.array(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99))
+    }
+
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size in MB, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def directory_size_mb(path: str) -> float:
+    """Total size of the files under a directory in MB"""
+    total = 0
+    for root, _, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(root, name))
+    return total / 2**20
+
+
+def quantization_report(store: QuestionVectorStore, query_texts: List, n_results: int) -> Dict:
+    """Compare quantized search against exact full-precision search"""
+    report = {"mode": store.quantization}
+    report["index_ram_mb"] = sum(index.memory_bytes() for index in store.quantized_indexes.values()) / 2**20
+
+    exact, rescored, quantized_only = [], [], []
+    embeddings = store.embedding_fn([query for _, query in query_texts])
+    for (section_num, _), embedding in zip(query_texts, embeddings):
+        index = store.quantized_indexes[section_num]
+        exact.append([question_id for question_id, _ in index.exact_search(embedding, n_results)])
+        rescored.append([question_id for question_id, _ in index.search(embedding, n_results)])
+        quantized_only.append([question_id for question_id, _ in index.search(embedding, n_results, rescore=False)])
+    report[f"recall_at_{n_results}"] = recall_at_k(exact, rescored, n_results)
+    report[f"recall_at_{n_results}_without_rescore"] = recall_at_k(exact, quantized_only, n_results)
+    return report
+
+
+def run_benchmark(
+    size: int,
+    queries: int,
+    n_results: int,
+    dimensions: int,
+    seed: int,
+    questions_per_video: int,
+    quantization: Optional[str] = None,
+    dedup: bool = False
+) -> Dict:
+    """Ingest a synthetic corpus of `size` questions and time the read paths"""
+    persist_directory = tempfile.mkdtemp(prefix="bench_vector_store_")
+    try:
+        rss_before = rss_mb()
+        store = QuestionVectorStore(
+            persist_directory,
+            embedding_backend="fake",
+            embedding_fn=DeterministicEmbeddingFunction(dimensions),
+            quantization=quantization,
+            dedup=dedup
+        )
+
+        # Ingest through the public API, one add_questions call per video
+        ids = {2: [], 3: []}
+        started = time.perf_counter()
+        for section_num, video_id, questions in synthetic_corpus(size, seed, questions_per_video):
+            store.add_questions(section_num, questions, video_id)
+            ids[section_num].extend(store.question_id(video_id, section_num, idx) for idx in range(len(questions)))
+        ingest_seconds = time.perf_counter() - started
+
+        # Queries come from a separate seed so they are not exact copies of the corpus
+        rng = random.Random(seed + 1)
+        query_texts = [
+            (rng.choice([2, 3]), f"{rng.choice(TOPICS)}について{rng.choice(PLACES)}で話しています")
+            for _ in range(queries)
+        ]
+
+        search = {}
+        for mode in ["vector", "lexical", "hybrid"]:
+            samples = []
+            for section_num, query in query_texts:
+                store.query_cache.clear()
+                started = time.perf_counter()
+                store.search_similar_questions(section_num, query, n_results=n_results, mode=mode)
+                samples.append(time.perf_counter() - started)
+            search[mode] = percentiles(samples)
+
+        lookups = []
+        for _ in range(queries):
+            section_num = rng.choice([2, 3])
+            question_id = rng.choice(ids[section_num])
+            started = time.perf_counter()
+            store.get_question_by_id(section_num, question_id)
+            lookups.append(time.perf_counter() - started)
+
+        rss_after = rss_mb()
+        result = {
+            "questions": size,
+            "ingest": {
+                "seconds": ingest_seconds,
+                "questions_per_second": size / ingest_seconds
+            },
+            "search_similar_questions": search,
+            "get_question_by_id": percentiles(lookups),
+            "memory": {
+                "rss_before_mb": rss_before,
+                "rss_after_mb": rss_after,
+                "rss_growth_mb": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+                "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            },
+            "disk_mb": directory_size_mb(persist_directory)
+        }
+        if quantization:
+            result["quantization"] = quantization_report(store, query_texts, n_results)
+        return result
+    finally:
+        shutil.rmtree(persist_directory, ignore_errors=True)
+
+
+def run_isolated(*args, **kwargs) -> Dict:
+    """Run one benchmark in a fresh process so RSS is not inflated by earlier runs"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(run_benchmark, args, kwargs)
+
+
+def compare_to_float32(result: Dict, baseline: Dict) -> Dict:
+    """Measured RSS and disk differences between a quantized run and an unquantized one"""
+    growth, baseline_growth = result["memory"]["rss_growth_mb"], baseline["memory"]["rss_growth_mb"]
+    return {
+        "float32_rss_growth_mb": baseline_growth,
+        "float32_disk_mb": baseline["disk_mb"],
+        "rss_delta_mb": growth - baseline_growth if growth is not None and baseline_growth is not None else None,
+        "disk_delta_mb": result["disk_mb"] - baseline["disk_mb"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark QuestionVectorStore on a synthetic JLPT corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000], help="Corpus sizes in questions")
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed per mode")
+    parser.add_argument("--n-results", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=1536, help="Fake embedding size")
+    parser.add_argument("--questions-per-video", type=int, default=6, help="Questions per add_questions call")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--quantization", choices=QUANTIZATION_MODES, default=None,
+                        help="Serve vector search from a quantized index and report recall@k and the "
+                             "measured RSS and disk deltas against an unquantized run")
+    parser.add_argument("--dedup", action="store_true", help="Merge near-duplicate questions during ingest")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "vector_store",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": {
+            "queries": args.queries,
+            "n_results": args.n_results,
+            "dimensions": args.dimensions,
+            "questions_per_video": args.questions_per_video,
+            "seed": args.seed,
+            "quantization": args.quantization,
+            "dedup": args.dedup
+        },
+        "results": []
+    }
+    for size in args.sizes:
+        print(f"Benchmarking {size} questions...", file=sys.stderr)
+        run_args = (size, args.queries, args.n_results, args.dimensions, args.seed, args.questions_per_video)
+        result = run_isolated(*run_args, quantization=args.quantization, dedup=args.dedup)
+        if args.quantization:
+            baseline = run_isolated(*run_args, quantization=None, dedup=args.dedup)
+            result["quantization"]["vs_float32"] = compare_to_float32(result, baseline)
+        report["results"].append(result)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,8 @@ from backend.get_transcript import YouTubeTranscriptDownloader
 
 from backend.chat import JapaneseTutor
 from backend.structured_data import TranscriptStructurer
-from backend.question_store import QuestionStore
+from backend.question_parser import format_question_block
+from backend.question_store import create_question_store
 from backend.audio_generator import AudioGenerator
 
 
@@ -30,7 +31,7 @@ if 'transcript' not in st.session_state:
 if 'messages' not in st.session_state:
     st.session_state.messages = []
 if 'question_store' not in st.session_state:
-    st.session_state.question_store = QuestionStore()
+    st.session_state.question_store = create_question_store()
 if 'audio_generator' not in st.session_state:
     st.session_state.audio_generator = AudioGenerator()
 
@@ -69,8 +70,23 @@ def render_sidebar():
             st.markdown("---")
             st.subheader("Saved Questions")
             
-            # List saved questions
-            saved_questions = st.session_state.question_store.list_saved_questions()
+            # List one page of saved questions at a time
+            store = st.session_state.question_store
+            practice_filter = st.selectbox(
+                "Practice Type",
+                ["All"] + store.list_practice_types(),
+                key="saved_practice_filter"
+            )
+            if st.session_state.get('saved_page_filter') != practice_filter:
+                # A new filter starts again from the first page
+                st.session_state.saved_page_filter = practice_filter
+                st.session_state.saved_page_cursors = [None]
+            cursors = st.session_state.saved_page_cursors
+            saved_questions, next_cursor = store.query_saved_questions(
+                practice_type=None if practice_filter == "All" else practice_filter,
+                limit=20,
+                cursor=cursors[-1]
+            )
             if saved_questions:
                 for question in saved_questions:
                     # Format timestamp for display
@@ -120,6 +136,16 @@ def render_sidebar():
                                         st.error("Failed to delete question set.")
             else:
                 st.info("No saved questions found.")
+
+            prev_col, next_col = st.columns([1, 1])
+            with prev_col:
+                if len(cursors) > 1 and st.button("◀ Newer", key="saved_page_prev"):
+                    cursors.pop()
+                    st.rerun()
+            with next_col:
+                if next_cursor and st.button("Older ▶", key="saved_page_next"):
+                    cursors.append(next_cursor)
+                    st.rerun()
         
         # Stage descriptions
         st.markdown("---")
@@ -313,25 +339,38 @@ def render_structured_stage():
             transcript_text += f"{entry['text']}\n"
         st.text_area("Full Transcript", transcript_text, height=200)
         
+        regenerate = st.checkbox("Regenerate (ignore cached results)", value=False)
         if st.button("Structure Transcript"):
-            with st.spinner("Processing transcript..."):
-                structurer = TranscriptStructurer()
-                try:
-                    structured_sections = structurer.structure_transcript(st.session_state.transcript)
-                    if structured_sections:
-                        # Save the structured questions
-                        video_id = st.session_state.get('video_id', 'unknown')
-                        filename = st.session_state.question_store.save_questions(structured_sections, video_id)
-                        st.session_state.structured_data = structured_sections
-                        st.success(f"Structured data saved as {filename}!")
-                        
-                        # Display the structured data
-                        st.subheader("Structured Format")
-                        st.json(structured_sections)
-                    else:
-                        st.error("Failed to structure transcript. Please try again.")
-                except Exception as e:
-                    st.error(f"Error structuring transcript: {str(e)}")
+            structurer = TranscriptStructurer()
+            try:
+                # Show questions as they are extracted instead of waiting for every section
+                st.subheader("Extracted Questions")
+                status = st.empty()
+                questions_by_section = {}
+                for section_num, question in structurer.stream_questions(
+                    st.session_state.transcript,
+                    use_cache=not regenerate
+                ):
+                    questions_by_section.setdefault(section_num, []).append(question)
+                    count = sum(len(questions) for questions in questions_by_section.values())
+                    status.info(f"Extracted {count} questions so far...")
+                    with st.expander(f"Section {section_num} - Question {len(questions_by_section[section_num])}"):
+                        st.json(question)
+
+                if questions_by_section:
+                    structured_sections = {
+                        section_num: "\n\n".join(format_question_block(question) for question in questions)
+                        for section_num, questions in sorted(questions_by_section.items())
+                    }
+                    # Save the structured questions
+                    video_id = st.session_state.get('video_id', 'unknown')
+                    filename = st.session_state.question_store.save_questions(structured_sections, video_id)
+                    st.session_state.structured_data = structured_sections
+                    status.success(f"Structured data saved as {filename}!")
+                else:
+                    status.error("Failed to structure transcript. Please try again.")
+            except Exception as e:
+                st.error(f"Error structuring transcript: {str(e)}")
         
         # Display previously structured data if available
         if hasattr(st.session_state, 'structured_data'):
@@ -601,7 +640,8 @@ def main():
         st.json({
             "selected_stage": selected_stage,
             "transcript_loaded": st.session_state.transcript is not None,
-            "chat_messages": len(st.session_state.messages)
+            "chat_messages": len(st.session_state.messages),
+            "question_load_cache": st.session_state.question_store.load_cache_stats()
         })
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+QUESTIONS = """<question>
+Introduction:
+駅で男の人と女の人が話しています。
+Conversation:
+男: 何時に会いましょうか。
+女: 三時はどうですか。
+Question:
+二人は何時に会いますか。
+Options:
+1. 一時
+2. 二時
+3. 三時
+4. 四時
+</question>
+<question>
+Introduction:
+店で店員と客が話しています。
+Conversation:
+客: このりんごはいくらですか。
+店員: 一つ百円です。
+Question:
+りんごはいくらですか。
+Options:
+1. 百円
+2. 二百円
+3. 三百円
+4. 四百円
+</question>
+"""
+
+
+MORNING = {
+    "Situation": "朝家を出ます。",
+    "Question": "何と言いますか。",
+    "Options": ["いってきます", "ただいま", "おやすみなさい", "いただきます"]
+}
+EVENING = dict(MORNING, Situation="夜家に帰ります。")
+SECTION2 = {
+    "Introduction": "駅で男の人と女の人が話しています。",
+    "Conversation": "男: 何時に会いましょうか。\n女: 三時はどうですか。\n男: じゃあ、三時に駅の前で会いましょう。",
+    "Question": "二人は何時に会いますか。",
+    "Options": ["一時", "二時", "三時", "四時"]
+}
+
+
+def write_questions(directory, name, text=QUESTIONS):
+    directory.mkdir(exist_ok=True)
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    return path
@@ -0,0 +1,81 @@
+from backend.dedup import MinHasher, NearDuplicateIndex, estimate_similarity, find_duplicate_clusters
+from backend.vector_store import QuestionVectorStore
+
+from tests.sample_data import write_questions
+
+
+def test_lsh_index_finds_near_duplicates(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "dedup.sqlite3"))
+    text = "駅で男の人と女の人が話しています。二人は何時に会いますか。三時に駅の前で会いましょう。"
+    index.add(2, "a", index.hasher.signature(text))
+
+    assert index.find_duplicate(2, index.hasher.signature(text + "はい。"))[0] == "a"
+    assert index.find_duplicate(3, index.hasher.signature(text)) is None
+    assert index.find_duplicate(2, index.hasher.signature("図書館で本を借りたいです。何と言いますか。")) is None
+
+    index.add_alias("b", "a", 0.9)
+    assert index.aliases("a") == ["b"]
+    assert index.canonical_id("b") == "a"
+    index.remove(["a"])
+    assert index.canonical_id("b") is None
+    assert index.find_duplicate(2, index.hasher.signature(text)) is None
+
+
+def test_find_duplicate_clusters():
+    hasher = MinHasher()
+    assert estimate_similarity(hasher.signature("同じ文です"), hasher.signature("同じ文です")) == 1.0
+    clusters = find_duplicate_clusters([
+        ("a", "店で客と店員が話しています。りんごはいくらですか。"),
+        ("b", "店で客と店員が話しています。りんごはいくらですか。"),
+        ("c", "図書館で本を借りたいです。何と言いますか。"),
+    ])
+    assert clusters == [["a", "b"]]
+
+
+def test_dedup_is_opt_in(tmp_path):
+    store = QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local")
+    questions_dir = tmp_path / "questions"
+    write_questions(questions_dir, "AAA_section2.txt")
+    write_questions(questions_dir, "BBB_section2.txt")
+    store.index_questions_directory(str(questions_dir))
+    assert store._get_collection(2).count() == 4
+
+
+def test_aliases_resolve_and_survive_deleting_the_canonical_file(tmp_path):
+    store = QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local", dedup=True)
+    questions_dir = tmp_path / "questions"
+    original = write_questions(questions_dir, "AAA_section2.txt")
+    write_questions(questions_dir, "BBB_section2.txt")
+    store.index_questions_directory(str(questions_dir))
+
+    assert store._get_collection(2).count() == 2
+    assert store.get_duplicate_aliases("AAA_2_1") == ["BBB_2_1"]
+    assert store.get_question_by_id(2, "BBB_2_1") == store.get_question_by_id(2, "AAA_2_1")
+
+    original.unlink()
+    totals = store.index_questions_directory(str(questions_dir))
+
+    assert totals["deleted"] == 2
+    assert store._get_collection(2).count() == 2
+    assert store.get_question_by_id(2, "BBB_2_0")["Question"] == "二人は何時に会いますか。"
+    assert store.get_question_by_id(2, "AAA_2_0") is None
+    # The re-indexed file is recorded in the manifest again
+    assert store.index_questions_directory(str(questions_dir))["unchanged"] == 2
+
+
+def test_alias_file_is_reindexed_by_a_later_run(tmp_path):
+    store = QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local", dedup=True)
+    questions_dir = tmp_path / "questions"
+    original = write_questions(questions_dir, "AAA_section2.txt")
+    write_questions(questions_dir, "BBB_section2.txt")
+    store.index_questions_directory(str(questions_dir))
+
+    # Emptying the canonical file deletes its questions outside a directory run
+    original.write_text("", encoding="utf-8")
+    store.index_questions_file(str(original), 2)
+    assert store._get_collection(2).count() == 0
+
+    reopened = QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local", dedup=True)
+    totals = reopened.index_questions_directory(str(questions_dir))
+    assert totals["added"] == 2
+    assert reopened._get_collection(2).count() == 2
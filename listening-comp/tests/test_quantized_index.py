@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from backend.quantized_index import QuantizedVectorIndex, recall_at_k
+from backend.vector_store import PLACEHOLDER_EMBEDDING, QuestionVectorStore
+
+from tests.sample_data import write_questions
+
+
+def random_vectors(count, dimensions=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((count, dimensions)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mode", ["float16", "int8"])
+def test_rescored_search_matches_exact_search(tmp_path, mode):
+    vectors = random_vectors(500)
+    index = QuantizedVectorIndex(str(tmp_path / "index"), mode=mode)
+    index.upsert([f"q{i}" for i in range(len(vectors))], vectors)
+
+    queries = random_vectors(20, seed=1)
+    exact = [[question_id for question_id, _ in index.exact_search(query, 5)] for query in queries]
+    rescored = [[question_id for question_id, _ in index.search(query, 5)] for query in queries]
+    assert recall_at_k(exact, rescored, 5) == 1.0
+
+    nearest, distance = index.search(vectors[7], 1)[0]
+    assert nearest == "q7"
+    assert distance == pytest.approx(0.0, abs=1e-4)
+
+
+def test_delete_and_reopen(tmp_path):
+    vectors = random_vectors(10)
+    path = str(tmp_path / "index")
+    index = QuantizedVectorIndex(path, mode="int8")
+    index.upsert([f"q{i}" for i in range(10)], vectors)
+    index.delete(["q0", "q5"])
+    index.upsert(["q3"], vectors[9:10])
+    index.close()
+
+    reopened = QuantizedVectorIndex(path, mode="int8")
+    assert len(reopened) == 8
+    # The last row moved into a freed slot must still be found by its own vector
+    assert {question_id for question_id, _ in reopened.search(vectors[9], 2)} == {"q3", "q9"}
+    assert reopened.search(vectors[4], 1)[0][0] == "q4"
+    assert "q0" not in {question_id for question_id, _ in reopened.search(vectors[0], 8)}
+
+
+def test_delete_moving_a_row_twice(tmp_path):
+    vectors = random_vectors(4)
+    path = str(tmp_path / "index")
+    index = QuantizedVectorIndex(path, mode="int8")
+    index.upsert(["A", "B", "C", "D"], vectors)
+    # D moves into C's row, then on into A's row within the same call
+    index.delete(["C", "A"])
+    index.close()
+
+    reopened = QuantizedVectorIndex(path, mode="int8")
+    for question_id, vector in (("B", vectors[1]), ("D", vectors[3])):
+        nearest, distance = reopened.search(vector, 1)[0]
+        assert nearest == question_id
+        assert distance == pytest.approx(0.0, abs=1e-4)
+    assert reopened.exact_search(vectors[3], 1)[0][0] == "D"
+
+
+def test_store_keeps_a_single_full_precision_copy(tmp_path):
+    store = QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local", quantization="int8")
+    store.index_questions_file(str(write_questions(tmp_path / "questions", "VIDEO_section2.txt")), 2)
+
+    stored = store._get_collection(2).get(include=['embeddings'])
+    assert [list(embedding) for embedding in stored['embeddings']] == [PLACEHOLDER_EMBEDDING] * 2
+
+    results = store.search_similar_questions(2, "りんごはいくらですか", n_results=1)
+    assert results[0]['Question'] == "りんごはいくらですか。"
+
+    store.quantized_indexes[2].clear()
+    assert store.search_similar_questions_batch([(2, "何時に会いますか")], n_results=2)[0]
+    assert len(store.quantized_indexes[2]) == 2
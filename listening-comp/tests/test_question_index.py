@@ -0,0 +1,55 @@
+import itertools
+
+import pytest
+
+from backend.question_index import QuestionSetIndex, SORT_FIELDS
+
+
+def header(number):
+    # Few distinct values per field so sort columns and timestamps tie often
+    return {
+        "filename": f"set{number:03d}.json",
+        "video_id": f"video{number % 3}",
+        "timestamp": f"2024-01-0{number % 4 + 1}T00:00:00",
+        "practice_type": ["Dialogue Practice", "Phrase Matching"][number % 2],
+        "topic": f"Topic {number % 5}",
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = QuestionSetIndex(str(tmp_path / "index.sqlite3"))
+    index.upsert(header(number) for number in range(40))
+    yield index
+    index.close()
+
+
+def expected_order(entries, sort_by, descending):
+    key = [sort_by] + (['timestamp'] if sort_by != 'timestamp' else []) + ['filename']
+    return sorted(entries, key=lambda entry: [entry[column] for column in key], reverse=descending)
+
+
+@pytest.mark.parametrize("sort_by,descending", list(itertools.product(SORT_FIELDS, [True, False])))
+@pytest.mark.parametrize("filters,since", [(None, None), ({"practice_type": "Phrase Matching"}, "2024-01-02")])
+def test_pages_cover_every_match_once_in_order(index, sort_by, descending, filters, since):
+    pages, cursor = [], None
+    while True:
+        page, cursor = index.query(filters=filters, since=since, sort_by=sort_by,
+                                   descending=descending, limit=7, cursor=cursor)
+        pages.extend(page)
+        if cursor is None:
+            break
+    matches = [header(number) for number in range(40)
+               if all(header(number)[field] == value for field, value in (filters or {}).items())
+               and (since is None or header(number)["timestamp"] >= since)]
+    assert pages == expected_order(matches, sort_by, descending)
+
+
+@pytest.mark.parametrize("sort_by", SORT_FIELDS)
+def test_sorting_uses_an_index_instead_of_a_temp_btree(index, sort_by):
+    key = [sort_by] + (['timestamp'] if sort_by != 'timestamp' else []) + ['filename']
+    plan = index._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT filename FROM question_sets ORDER BY "
+        + ", ".join(f"{column} DESC" for column in key)
+    ).fetchall()
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
@@ -0,0 +1,31 @@
+from backend.question_parser import format_question_block, merge_question_blocks, question_content
+
+from tests.sample_data import EVENING, MORNING, SECTION2
+
+
+def test_question_content_ignores_labels_prompt_and_options():
+    assert question_content(MORNING) == "朝家を出ます。"
+    assert question_content({"Question": "何と言いますか。", "Options": ["はい"]}) == "何と言いますか。\nはい"
+
+
+def test_questions_sharing_options_are_kept():
+    output = format_question_block(MORNING) + "\n\n" + format_question_block(EVENING)
+    assert merge_question_blocks([output, ""]).count("<question>") == 2
+    # Questions with the same options in neighbouring windows are still distinct
+    assert merge_question_blocks([format_question_block(MORNING), format_question_block(EVENING)]).count("<question>") == 2
+
+
+def test_overlapping_windows_keep_the_longer_copy():
+    truncated = dict(SECTION2, Options=SECTION2["Options"][:2])
+    first = format_question_block(MORNING) + "\n\n" + format_question_block(truncated)
+    second = format_question_block(SECTION2) + "\n\n" + format_question_block(EVENING)
+
+    merged = merge_question_blocks([first, second])
+    assert merged.count("<question>") == 3
+    assert merged.index("朝家を出ます") < merged.index("駅で男の人") < merged.index("夜家に帰ります")
+    assert "4. 四時" in merged
+
+
+def test_only_neighbouring_windows_are_compared():
+    block = format_question_block(SECTION2)
+    assert merge_question_blocks([block, "", block]).count("<question>") == 2
@@ -0,0 +1,98 @@
+import glob
+import os
+
+from backend.segment_store import SegmentLogQuestionStore, encode_record, _OP_PUT
+
+
+def question_set(number):
+    return {
+        "practice_type": "Dialogue Practice",
+        "topic": f"Topic {number}",
+        "questions": [{"Question": f"質問{number}", "Options": ["はい", "いいえ"]}]
+    }
+
+
+def open_store(base_dir, **kwargs):
+    return SegmentLogQuestionStore(str(base_dir), shards=2, **kwargs)
+
+
+def snapshot(store):
+    return {entry["filename"]: store.load_questions(entry["filename"]) for entry in store.list_saved_questions()}
+
+
+def test_replay_rebuilds_the_indexes(tmp_path):
+    store = open_store(tmp_path)
+    names = [store.save_questions(question_set(i), f"video{i}") for i in range(6)]
+    store.delete_questions(names[1])
+    # Rewriting a set under the same name leaves the old record dead in the log
+    store._write_question_set(names[2], dict(question_set(99), video_id="video2", timestamp="t"))
+    expected = snapshot(store)
+    assert len(expected) == 5 and expected[names[2]]["topic"] == "Topic 99"
+
+    for path in glob.glob(str(tmp_path / "*.sqlite3*")):
+        os.remove(path)
+    assert snapshot(open_store(tmp_path)) == expected
+
+
+def test_interrupted_append_is_cut_on_open(tmp_path):
+    store = open_store(tmp_path)
+    name = store.save_questions(question_set(1), "video1")
+    shard, segment = store._location(name)[:2]
+    path = store._shards[shard].path(segment)
+    size = os.path.getsize(path)
+    # A crash mid-append leaves a partial record that the offset index never saw
+    with open(path, "ab") as f:
+        f.write(encode_record(_OP_PUT, "partial.json", b"x" * 100)[:40])
+
+    reopened = open_store(tmp_path)
+    assert os.path.getsize(path) == size
+    assert reopened.load_questions(name)["topic"] == "Topic 1"
+    later = reopened.save_questions(question_set(2), "video2")
+    assert reopened.load_questions(later)["topic"] == "Topic 2"
+
+    # Replaying from scratch stops at a corrupt tail as well
+    with open(path, "ab") as f:
+        f.write(b"QSL1garbage")
+    assert reopened.rebuild_index() == 2
+    assert set(snapshot(reopened)) == {name, later}
+
+
+def test_compaction_round_trip(tmp_path):
+    store = open_store(tmp_path, segment_max_bytes=400)
+    names = [store.save_questions(question_set(i), f"video{i}") for i in range(20)]
+    for name in names[::2]:
+        store.delete_questions(name)
+    expected = snapshot(store)
+    before = store.segment_stats()
+
+    totals = store.compact(min_dead_ratio=0.3)
+    after = store.segment_stats()
+    assert totals["shards"] == 2 and totals["records_moved"] == 10
+    assert after["dead_bytes"] == 0
+    assert after["live_bytes"] == before["live_bytes"]
+    assert after["total_bytes"] < before["total_bytes"]
+    assert snapshot(store) == expected
+
+    # Deleted sets must not come back when the compacted log is replayed
+    assert store.rebuild_index() == 10
+    assert snapshot(store) == expected
+    later = store.save_questions(question_set(50), "video50")
+    assert open_store(tmp_path).load_questions(later)["topic"] == "Topic 50"
+
+
+def test_interrupted_first_append_to_a_new_segment_is_removed(tmp_path):
+    store = open_store(tmp_path)
+    name = store.save_questions(question_set(1), "video1")
+    shard_num = store._location(name)[0]
+    shard = store._shards[shard_num]
+    # A crash during the first append to a freshly rotated segment
+    with open(shard.path(shard.segment_ids()[-1] + 1), "wb") as f:
+        f.write(encode_record(_OP_PUT, "partial.json", b"x" * 100)[:40])
+
+    reopened = open_store(tmp_path)
+    assert shard.segment_ids() == [store._location(name)[1]]
+    # Sets saved afterwards into that shard survive a replay of the log
+    later = [reopened.save_questions(question_set(i), f"video{i}") for i in range(2, 8)]
+    later = [name for name in later if reopened._location(name)[0] == shard_num] + [name]
+    reopened.rebuild_index()
+    assert set(later) <= set(snapshot(reopened))
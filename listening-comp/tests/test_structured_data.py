@@ -0,0 +1,27 @@
+from backend.structured_data import TranscriptStructurer
+
+from tests.sample_data import EVENING, MORNING, SECTION2
+
+
+def stream(monkeypatch, windows_questions, chunk_chars=None):
+    """Run stream_questions with each window answered by the given questions"""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    structurer = TranscriptStructurer(cache_path=None, chunk_chars=chunk_chars, chunk_overlap=0, max_concurrency=1)
+    windows = {f"window{i}": questions for i, questions in enumerate(windows_questions)}
+    monkeypatch.setattr(structurer, "_section_inputs", lambda text, sections: {
+        section_num: "\n".join(windows) if section_num == 3 else "" for section_num in sections
+    })
+    monkeypatch.setattr(structurer, "_stream_section",
+                        lambda section_num, window, use_cache=True: iter(
+                            [question for line in window.split("\n") for question in windows.get(line, [])]
+                        ))
+    return [question for _, question in structurer.stream_questions("transcript")]
+
+
+def test_questions_from_one_window_are_never_dropped(monkeypatch):
+    assert stream(monkeypatch, [[MORNING, EVENING, MORNING]]) == [MORNING, EVENING, MORNING]
+
+
+def test_overlapping_windows_drop_repeated_questions(monkeypatch):
+    questions = stream(monkeypatch, [[MORNING, SECTION2], [SECTION2, EVENING]], chunk_chars=8)
+    assert questions == [MORNING, SECTION2, EVENING]
@@ -0,0 +1,16 @@
+from backend.token_budget import compact_transcript, estimate_tokens, log_token_usage
+
+
+def test_token_usage_is_printed(capsys):
+    log_token_usage("section 1", 110, {"prompt_tokens": 100, "completion_tokens": 20})
+    log_token_usage("tutor response", 42)
+    assert capsys.readouterr().out.splitlines() == [
+        "section 1: estimated 110 prompt tokens, actual 100 (+10%), 20 completion tokens",
+        "tutor response: estimated 42 prompt tokens",
+    ]
+
+
+def test_compact_transcript_keeps_times_in_dialogue():
+    text = "00:01 問題1\n[00:02] えっと\n00:03 男: 3:00に会いましょう。\n00:04 男: 3:00に会いましょう。\n"
+    assert compact_transcript(text) == "問題1\n男: 3:00に会いましょう。"
+    assert estimate_tokens("") == 0
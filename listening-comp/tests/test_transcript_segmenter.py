@@ -0,0 +1,27 @@
+from backend.transcript_segmenter import find_section_boundaries, section_inputs, segment_transcript
+
+SECTION1 = "問題1\n1番\n男の人と女の人が話しています。男の人はこれから何をしますか。\n"
+SECTION2 = "問題2\n1番\n店で客と店員が話しています。客は何を買いますか。\n2番\n駅で男の人が話しています。電車は何時に出ますか。\n"
+
+
+def test_mentions_inside_a_sentence_are_not_headers():
+    text = "問題1から問題3まであります。\n" + SECTION1 + SECTION2
+    assert [section_num for section_num, _ in find_section_boundaries(text)] == [1, 2]
+
+    segments = segment_transcript(text)
+    assert "男の人はこれから何をしますか" in segments[1]
+    assert "客は何を買いますか" in segments[2]
+    assert "これから何をしますか" not in segments[2]
+
+
+def test_header_variants():
+    text = "もんだい １、\n" + SECTION1.split("\n", 1)[1] + "問題二\n" + SECTION2.split("\n", 1)[1]
+    assert [section_num for section_num, _ in find_section_boundaries(text)] == [1, 2]
+
+
+def test_short_slice_falls_back_to_full_transcript():
+    text = "問題1\n問題2\n" + SECTION2.split("\n", 1)[1]
+    inputs = section_inputs(text, [1, 2, 3])
+    assert inputs[1] == text
+    assert inputs[2].startswith("問題2")
+    assert inputs[3] == text
@@ -0,0 +1,24 @@
+from backend.vector_store import QuestionVectorStore
+
+from tests.sample_data import write_questions
+
+
+def make_store(tmp_path, **kwargs):
+    return QuestionVectorStore(str(tmp_path / "store"), embedding_backend="local", **kwargs)
+
+
+def test_unparseable_file_keeps_indexed_questions(tmp_path):
+    questions_dir = tmp_path / "questions"
+    path = write_questions(questions_dir, "VIDEO_section2.txt")
+    store = make_store(tmp_path)
+    assert store.index_questions_directory(str(questions_dir))["added"] == 2
+
+    path.write_bytes(path.read_bytes() + b"\xff\xfe")
+    totals = store.index_questions_directory(str(questions_dir))
+
+    assert totals["failed"] == 1
+    assert totals["deleted"] == 0
+    assert store._get_collection(2).count() == 2
+    # The file was not recorded as indexed, so a fixed file is picked up again
+    write_questions(questions_dir, "VIDEO_section2.txt")
+    assert store.index_questions_directory(str(questions_dir))["failed"] == 0